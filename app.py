@@ -1,10 +1,18 @@
-from fastapi import FastAPI, HTTPException
+import os
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+import numpy as np
 import pandas as pd
-from source.pipeline.predict_pipeline import CustomData, PredictPipeline
+from source.pipeline.predict_pipeline import CustomData
+from source.pipeline.model_server import ModelServer, LEGACY_VERSION
+from source.pipeline.drift_monitor import DriftMonitor, DriftMonitorConfig
 from source.logger import logging
 
 app = FastAPI()
+model_server = ModelServer()
+drift_monitor = None
 
 
 # Pydantic model for input data validation
@@ -17,6 +25,13 @@ class RatingInput(BaseModel):
     type: str
     city: str
 
+class CanaryInput(BaseModel):
+    version: str
+    weight: float
+
+class ShadowInput(BaseModel):
+    version: str
+
 # Define valid options
 valid_online_order = ["Yes", "No"]
 valid_book_table = ["Yes", "No"]
@@ -37,23 +52,128 @@ valid_city = [
     "MG Road", "New BEL Road", "Old Airport Road", "Rajajinagar", "Residency Road",
     "Sarjapur Road", "Whitefield"
 ]
+valid_mode = ["model", "lookup"]
+default_mode = os.environ.get("PREDICTION_MODE", "model")
+
+# The materialized prediction table is memory-mapped on first use and reloaded when it is rematerialized
+prediction_table = None
+prediction_table_mtime = -1
+
+def get_prediction_table():
+    """Return the current prediction table, or None when there is no usable table."""
+    global prediction_table, prediction_table_mtime
+    from source.pipeline.prediction_table import PredictionTable, PredictionTableConfig
+
+    table_config = PredictionTableConfig()
+    try:
+        metadata_mtime = os.stat(table_config.metadata_path).st_mtime_ns
+    except OSError:
+        metadata_mtime = None
+
+    # A missing or broken table is only reported once, not retried on every request
+    if metadata_mtime != prediction_table_mtime:
+        prediction_table, prediction_table_mtime = None, metadata_mtime
+        if metadata_mtime is None:
+            logging.warning("No prediction table found, lookup mode falls back to the model")
+        else:
+            try:
+                prediction_table = PredictionTable(table_config)
+            except Exception as e:
+                logging.warning(f"Could not load the prediction table, lookup mode falls back to the model: {e}")
+    return prediction_table
+
+def table_matches_active_model(table):
+    # The table only stands in for the model when it was scored with the same version and variant
+    active_version = model_server.active_version
+    active_pipeline = model_server.pipelines.get(active_version)
+    return (table is not None and active_pipeline is not None
+            and table.model_version == active_version
+            and table.metadata.get("model_variant") == active_pipeline.config.model_variant)
+
+def rebuild_drift_monitor(version):
+    """Compare live traffic against the reference profile saved with the version that is now active."""
+    global drift_monitor
+    drift_config = DriftMonitorConfig()
+    if version != LEGACY_VERSION:
+        drift_config.reference_profile_path = os.path.join(model_server.registry.version_path(version),
+                                                           os.path.basename(drift_config.reference_profile_path))
+    previous_monitor = drift_monitor
+    if os.path.exists(drift_config.reference_profile_path):
+        drift_monitor = DriftMonitor(drift_config)
+    else:
+        drift_monitor = None
+        logging.warning(f"No reference profile found for model version {version}, drift monitoring is disabled")
+    if previous_monitor is not None:
+        previous_monitor.stop()
+
+@app.on_event("startup")
+async def load_active_model():
+    # The drift monitor follows the active version, including the first activation below
+    model_server.add_switch_listener(rebuild_drift_monitor)
+    # Load the registry's CURRENT version in the background; /predict answers 503 until it is warm
+    model_server.activate()
+    # Follow CURRENT and canary/shadow changes made through any worker or by a new training run
+    model_server.start_watching()
+
+@app.on_event("shutdown")
+async def stop_model_watcher():
+    model_server.stop_watching()
+
+def validate_input(input_data):
+    if input_data.online_order not in valid_online_order:
+        raise HTTPException(status_code=400, detail="Invalid value for online_order")
+    if input_data.book_table not in valid_book_table:
+        raise HTTPException(status_code=400, detail="Invalid value for book_table")
+    if input_data.rest_type not in valid_rest_type:
+        raise HTTPException(status_code=400, detail="Invalid value for rest_type")
+    if input_data.type not in valid_type:
+        raise HTTPException(status_code=400, detail="Invalid value for type")
+    if input_data.city not in valid_city:
+        raise HTTPException(status_code=400, detail="Invalid value for city")
+    if input_data.cost <= 0:
+        raise HTTPException(status_code=400, detail="Cost must be greater than 0")
+
+async def ensure_model_loaded(model):
+    # Pinned versions are loaded off the event loop, other requests keep being served meanwhile
+    if model is not None:
+        try:
+            await run_in_threadpool(model_server.load_version, model)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown model version: {model}")
+    elif not model_server.is_ready():
+        raise HTTPException(status_code=503, detail="Model is still loading")
+
+async def route_request(model):
+    """Route a request; a pinned version evicted before it could be used is loaded again."""
+    for _ in range(3):
+        await ensure_model_loaded(model)
+        try:
+            return model_server.route(model)
+        except KeyError:
+            logging.warning(f"Model version {model} was evicted before use, loading it again")
+    raise HTTPException(status_code=503, detail=f"Model version {model} could not be kept loaded, try again")
+
+def run_shadow(version, data, served_version, served_prediction):
+    try:
+        shadow_prediction = model_server.pipelines[version].predict(data)[0]
+        logging.info("Shadow prediction", extra={
+            "hot_path": True, "shadow_version": version, "shadow_prediction": float(shadow_prediction),
+            "model_version": served_version, "prediction": float(served_prediction),
+        })
+    except Exception as e:
+        logging.error(f"Shadow prediction with {version} failed: {e}")
 
 @app.post("/predict")
-async def predict_rating(input_data: RatingInput):
+async def predict_rating(input_data: RatingInput, background_tasks: BackgroundTasks,
+                         mode: str = default_mode, model: Optional[str] = None):
     try:
+        if mode not in valid_mode:
+            raise HTTPException(status_code=400, detail="Invalid value for mode")
+        if mode == "lookup" and model is not None:
+            raise HTTPException(status_code=400, detail="mode=lookup cannot be combined with model=, "
+                                                        "the table is built from a single model version")
         # Validate input values
-        if input_data.online_order not in valid_online_order:
-            raise HTTPException(status_code=400, detail="Invalid value for online_order")
-        if input_data.book_table not in valid_book_table:
-            raise HTTPException(status_code=400, detail="Invalid value for book_table")
-        if input_data.rest_type not in valid_rest_type:
-            raise HTTPException(status_code=400, detail="Invalid value for rest_type")
-        if input_data.type not in valid_type:
-            raise HTTPException(status_code=400, detail="Invalid value for type")
-        if input_data.city not in valid_city:
-            raise HTTPException(status_code=400, detail="Invalid value for city")
-        if input_data.cost <= 0:
-            raise HTTPException(status_code=400, detail="Cost must be greater than 0")
+        validate_input(input_data)
 
         # Create a CustomData instance with the input values
         custom_data = CustomData(
@@ -66,28 +186,161 @@ async def predict_rating(input_data: RatingInput):
             city=input_data.city
         )
 
-        # Log input data
-        logging.info(f"Input data: {custom_data}")
-
         # Get the DataFrame representation of the input data
         data = custom_data.get_data_as_data_frame()
+        inputs = input_data.model_dump()
 
-        # Log DataFrame
-        logging.info(f"DataFrame: {data}")
+        # Lookup mode reads the precomputed table and falls back to the model off-grid, when there is
+        # no table, or when it was built from another version or variant than the active model
+        if mode == "lookup":
+            table = get_prediction_table()
+            if table_matches_active_model(table):
+                looked_up = table.lookup(data)[0]
+                if not np.isnan(looked_up):
+                    if drift_monitor is not None:
+                        drift_monitor.record(inputs, float(looked_up))
+                    logging.info("Prediction served", extra={
+                        "hot_path": True, "inputs": inputs, "mode": mode, "model_version": table.model_version,
+                        "prediction": float(looked_up),
+                    })
+                    return {"predicted_rating": float(looked_up), "model_version": table.model_version,
+                            "error_bound": table.error_bound}
 
-        # Create a PredictPipeline instance and make a prediction
-        predict_pipeline = PredictPipeline()
+        # Route to the pinned, canary or active version and make a prediction
+        version, predict_pipeline = await route_request(model)
         prediction = predict_pipeline.predict(data)
 
-        # Log prediction
-        logging.info(f"Prediction: {prediction}")
+        # Queue the observation for the drift sketches; they are updated in batches off the request path
+        if drift_monitor is not None:
+            drift_monitor.record(inputs, float(prediction[0]))
+
+        # Log one sampled, structured record per request; formatting happens on the logging thread
+        logging.info("Prediction served", extra={
+            "hot_path": True, "inputs": inputs, "mode": mode, "model_version": version,
+            "prediction": float(prediction[0]),
+        })
+
+        shadow_version = model_server.shadow_version
+        if shadow_version is not None and shadow_version != version:
+            background_tasks.add_task(run_shadow, shadow_version, data, version, prediction[0])
 
-        return {"predicted_rating": prediction[0]}
+        return {"predicted_rating": float(prediction[0]), "model_version": version}
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error occurred: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
 
+async def explain_inputs(inputs, model):
+    """Explain a list of RatingInput with the pinned or active version, in one vectorized pass."""
+    for input_data in inputs:
+        validate_input(input_data)
+    if model is not None:
+        version, predict_pipeline = await route_request(model)
+    else:
+        await ensure_model_loaded(model)
+        version = model_server.active_version
+        predict_pipeline = model_server.pipelines[version]
+    explainer = await run_in_threadpool(model_server.get_explainer, version)
+    if explainer is None:
+        raise HTTPException(status_code=501, detail=f"No explainer available for the {predict_pipeline.config.model_variant} "
+                                                    f"variant of model version {version}")
+
+    data = pd.DataFrame([input_data.model_dump() for input_data in inputs])
+    predictions, contributions = explainer.explain(predict_pipeline.preprocessor.transform(data))
+    explanations = [
+        {
+            "predicted_rating": float(prediction),
+            "expected_value": explainer.expected_value,
+            "contributions": dict(zip(explainer.input_features, row_contributions.tolist())),
+        }
+        for prediction, row_contributions in zip(predictions, contributions)
+    ]
+    return version, explanations
+
+@app.post("/explain")
+async def explain_rating(input_data: RatingInput, model: Optional[str] = None):
+    try:
+        version, explanations = await explain_inputs([input_data], model)
+        return {"model_version": version, **explanations[0]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error occurred: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/explain/batch")
+async def explain_ratings(inputs: List[RatingInput], model: Optional[str] = None):
+    try:
+        if not inputs:
+            raise HTTPException(status_code=400, detail="No inputs to explain")
+        version, explanations = await explain_inputs(inputs, model)
+        return {"model_version": version, "explanations": explanations}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error occurred: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/drift")
+async def get_drift():
+    if drift_monitor is None:
+        raise HTTPException(status_code=404, detail="Drift monitoring is disabled")
+    return await run_in_threadpool(drift_monitor.drift_report)
+
+@app.post("/drift/reset")
+async def reset_drift():
+    if drift_monitor is None:
+        raise HTTPException(status_code=404, detail="Drift monitoring is disabled")
+    drift_monitor.reset()
+    return {"message": "Drift statistics reset"}
+
+@app.get("/models")
+async def list_models():
+    return model_server.status()
+
+@app.post("/models/{version}/activate", status_code=202)
+async def activate_model(version: str):
+    if version not in model_server.registry.list_versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {version}")
+    try:
+        await run_in_threadpool(model_server.registry.verify, version)
+    except Exception as e:
+        raise HTTPException(status_code=409, detail=f"Model version {version} failed verification: {e}")
+    # Loading, warm-up and the switch happen in the background, and CURRENT, which every worker
+    # follows, is only written once the version loaded here; GET /models reports the outcome
+    model_server.activate(version, promote=True)
+    return {"message": f"Activating model version {version}", "status_url": "/models"}
+
+@app.post("/models/canary")
+async def set_canary(canary_input: CanaryInput):
+    if not 0 <= canary_input.weight <= 1:
+        raise HTTPException(status_code=400, detail="Canary weight must be between 0 and 1")
+    try:
+        await run_in_threadpool(model_server.set_canary, canary_input.version, canary_input.weight)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {canary_input.version}")
+    return model_server.status()
+
+@app.delete("/models/canary")
+async def clear_canary():
+    await run_in_threadpool(model_server.clear_canary)
+    return model_server.status()
+
+@app.post("/models/shadow")
+async def set_shadow(shadow_input: ShadowInput):
+    try:
+        await run_in_threadpool(model_server.set_shadow, shadow_input.version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {shadow_input.version}")
+    return model_server.status()
+
+@app.delete("/models/shadow")
+async def clear_shadow():
+    await run_in_threadpool(model_server.clear_shadow)
+    return model_server.status()
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Zomato Rating Prediction API"}
@@ -1,12 +1,74 @@
+import hashlib
 import streamlit as st
 import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
 from source.pipeline.predict_pipeline import CustomData, PredictPipeline
+from source.pipeline.model_registry import ModelRegistry
+from source.utils import get_feature_domain
+
+# Columns a bulk scoring CSV must contain, in the order the model expects them
+REQUIRED_COLUMNS = ["online_order", "book_table", "votes", "rest_type", "cost", "type", "city"]
+BULK_CHUNK_SIZE = 5000
 
 # Set page config for a custom icon and title
 st.set_page_config(page_title="Zomato Rating Prediction", page_icon="🍽️")
 
+
+# Load the model and preprocessor once per registry version and share them across reruns and sessions
+@st.cache_resource(max_entries=2)
+def load_predict_pipeline(version):
+    registry = ModelRegistry()
+    if version is None:
+        # Nothing published yet, serve the legacy artifacts/ files
+        return PredictPipeline().load()
+    registry.verify(version)
+    return PredictPipeline(registry.get_pipeline_config(version)).load()
+
+
+def get_predict_pipeline():
+    # CURRENT is re-read on every rerun, so an activation or a new training run is picked up
+    return load_predict_pipeline(ModelRegistry().current_version())
+
+
+def split_valid_rows(data, preprocessor):
+    """Check every row against the preprocessor's inputs; return (valid rows, rejected rows with a reason)."""
+    num_features, cat_domain = get_feature_domain(preprocessor)
+    uploaded_data, data = data, data.copy()
+    reasons = [[] for _ in range(len(data))]
+
+    for feature in num_features:
+        raw_values = data[feature]
+        data[feature] = pd.to_numeric(raw_values, errors="coerce")
+        for position in np.flatnonzero(data[feature].isna().to_numpy()):
+            reasons[position].append(f"{feature} is not a number ({raw_values.iloc[position]!r})")
+        for position in np.flatnonzero((data[feature] < 0).to_numpy()):
+            reasons[position].append(f"{feature} is negative")
+    if "cost" in num_features:
+        for position in np.flatnonzero((data["cost"] == 0).to_numpy()):
+            reasons[position].append("cost must be greater than 0")
+
+    for feature, categories in cat_domain.items():
+        for position in np.flatnonzero((~data[feature].astype(str).isin(categories)).to_numpy()):
+            reasons[position].append(f"unknown {feature} {data[feature].iloc[position]!r}")
+
+    rejected = np.array([bool(row_reasons) for row_reasons in reasons], dtype=bool)
+    # Rejected rows are returned as uploaded so they can be fixed and uploaded again
+    rejected_data = uploaded_data[rejected].assign(
+        rejection_reason=["; ".join(row_reasons) for row_reasons in reasons if row_reasons]
+    )
+    return data[~rejected], rejected_data
+
+
+def score_in_chunks(data, predict_pipeline, progress_bar):
+    predictions = []
+    for start in range(0, len(data), BULK_CHUNK_SIZE):
+        chunk = data.iloc[start:start + BULK_CHUNK_SIZE][REQUIRED_COLUMNS]
+        predictions.extend(predict_pipeline.predict(chunk))
+        progress_bar.progress(min(start + BULK_CHUNK_SIZE, len(data)) / len(data))
+    scored = data.copy()
+    scored["predicted_rating"] = predictions
+    return scored
+
 # Apply custom CSS
 # Apply custom CSS for better styling
 st.markdown(
@@ -89,6 +151,60 @@ st.markdown(
 # Author label in the sidebar
 #st.sidebar.markdown("<div class='author'>Author: Lavish Gangwani</div>", unsafe_allow_html=True)
 
+mode = st.sidebar.radio("Mode", ["Single prediction", "Bulk CSV scoring"])
+
+if mode == "Bulk CSV scoring":
+    st.markdown("### Upload a CSV of restaurants to score")
+    st.markdown(f"Required columns: `{', '.join(REQUIRED_COLUMNS)}`")
+    uploaded_file = st.file_uploader("Restaurants CSV", type="csv")
+
+    if uploaded_file is not None:
+        data = pd.read_csv(uploaded_file)
+        missing_columns = [column for column in REQUIRED_COLUMNS if column not in data.columns]
+
+        if missing_columns:
+            st.warning(f"Missing columns: {', '.join(missing_columns)}")
+        elif data.empty:
+            st.warning("The uploaded file has no rows.")
+        else:
+            # Keep the scored file across reruns so the download button does not trigger a rescore;
+            # the key is the file content and the served version, so a changed file or model rescores
+            predict_pipeline = get_predict_pipeline()
+            upload_key = (hashlib.sha256(uploaded_file.getvalue()).hexdigest(), predict_pipeline.config.model_path)
+            if st.session_state.get("scored_upload_key") != upload_key:
+                valid_data, rejected_data = split_valid_rows(data, predict_pipeline.preprocessor)
+                if not valid_data.empty:
+                    progress_bar = st.progress(0.0)
+                    valid_data = score_in_chunks(valid_data, predict_pipeline, progress_bar)
+                st.session_state["scored_data"] = valid_data
+                st.session_state["rejected_data"] = rejected_data
+                st.session_state["scored_upload_key"] = upload_key
+
+            scored_data = st.session_state["scored_data"]
+            rejected_data = st.session_state["rejected_data"]
+            if not scored_data.empty:
+                st.success(f"Scored {len(scored_data)} restaurants.")
+                st.dataframe(scored_data.head(100))
+                st.download_button(
+                    "Download predictions",
+                    data=scored_data.to_csv(index=False).encode("utf-8"),
+                    file_name="predicted_ratings.csv",
+                    mime="text/csv",
+                )
+            if not rejected_data.empty:
+                st.warning(f"Rejected {len(rejected_data)} rows that the model cannot score.")
+                st.dataframe(rejected_data.head(100))
+                st.download_button(
+                    "Download rejected rows",
+                    data=rejected_data.to_csv(index=False).encode("utf-8"),
+                    file_name="rejected_rows.csv",
+                    mime="text/csv",
+                )
+
+    # Footer
+    st.markdown("##### Author : Lavish Gangwani")
+    st.stop()
+
 # Collect user input
 online_order = st.selectbox("Online Order", ["Select an option", "Yes", "No"])
 book_table = st.selectbox("Book Table", ["Select an option", "Yes", "No"])
@@ -130,8 +246,8 @@ if st.button("Predict Rating"):
         # Get the DataFrame representation of the input data
         data = custom_data.get_data_as_data_frame()
 
-        # Create a PredictPipeline instance and make a prediction
-        predict_pipeline = PredictPipeline()
+        # Make a prediction with the cached PredictPipeline
+        predict_pipeline = get_predict_pipeline()
         prediction = predict_pipeline.predict(data)
 
         # Display the prediction
@@ -0,0 +1,47 @@
+import os
+import time
+import statistics
+import requests
+
+# Latency of /explain (single and batch) next to /predict against a running API
+base_url = os.environ.get("BENCHMARK_URL", "http://127.0.0.1:8000")
+n_requests = int(os.environ.get("BENCHMARK_REQUESTS", "200"))
+batch_size = int(os.environ.get("BENCHMARK_BATCH_SIZE", "100"))
+data = {
+    "online_order": "Yes",
+    "book_table": "No",
+    "votes": 775,
+    "rest_type": "Casual Dining",
+    "cost": 800,
+    "type": "Buffet",
+    "city": "Banashankari"
+}
+
+
+def measure(path, payload):
+    session = requests.Session()
+    # Warm up the connection and any lazily loaded artifacts
+    session.post(base_url + path, json=payload).raise_for_status()
+
+    latencies_ms = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        session.post(base_url + path, json=payload).raise_for_status()
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    latencies_ms.sort()
+    return {
+        "p50": statistics.median(latencies_ms),
+        "p95": latencies_ms[int(0.95 * (len(latencies_ms) - 1))],
+        "p99": latencies_ms[int(0.99 * (len(latencies_ms) - 1))],
+    }
+
+
+for name, path, payload, n_rows in [
+    ("/predict", "/predict", data, 1),
+    ("/explain", "/explain", data, 1),
+    (f"/explain/batch ({batch_size} rows)", "/explain/batch", [data] * batch_size, batch_size),
+]:
+    result = measure(path, payload)
+    print(f"{name}: p50 {result['p50']:.2f}ms, p95 {result['p95']:.2f}ms, p99 {result['p99']:.2f}ms, "
+          f"{result['p50'] / n_rows:.3f}ms per row at p50")
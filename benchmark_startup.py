@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import statistics
+import subprocess
+import requests
+
+# Measures cold start: process launch until the first successful /predict, plus the import cost of the app module
+port = int(os.environ.get("BENCHMARK_PORT", "8765"))
+n_runs = int(os.environ.get("BENCHMARK_RUNS", "5"))
+url = f'http://127.0.0.1:{port}/predict'
+data = {
+    "online_order": "Yes",
+    "book_table": "No",
+    "votes": 775,
+    "rest_type": "Casual Dining",
+    "cost": 800,
+    "type": "Buffet",
+    "city": "Banashankari"
+}
+
+
+def measure_import_seconds(module_name):
+    code = f"import time; start = time.perf_counter(); import {module_name}; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def measure_start_to_first_predict(timeout_seconds=120):
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout_seconds:
+            try:
+                response = requests.post(url, json=data, timeout=5)
+                if response.status_code == 200:
+                    return time.perf_counter() - start
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"No successful /predict within {timeout_seconds} seconds")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+for module_name in ["source.pipeline.predict_pipeline", "app"]:
+    timings = [measure_import_seconds(module_name) for _ in range(n_runs)]
+    print(f"import {module_name}: median {statistics.median(timings):.3f}s, "
+          f"min {min(timings):.3f}s, max {max(timings):.3f}s")
+
+timings = [measure_start_to_first_predict() for _ in range(n_runs)]
+print(f"process start to first successful /predict: median {statistics.median(timings):.3f}s, "
+      f"min {min(timings):.3f}s, max {max(timings):.3f}s")
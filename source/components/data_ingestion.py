@@ -9,6 +9,11 @@ from source.exception import CustomException
 from source.logger import logging
 from source.components.data_transformation import DataTransformation
 from source.components.model_trainer import ModelTrainer
+from source.components.model_distiller import ModelDistiller
+from source.components.model_optimizer import ModelOptimizer
+from source.components.explainer_builder import ExplainerBuilder
+from source.pipeline.model_registry import ModelRegistry
+from source.pipeline.model_server import ModelServer
 
 # Configuration class for data ingestion paths
 @dataclass
@@ -72,9 +77,39 @@ if __name__ == "__main__":
     # Create a ModelTrainer object
     model_trainer_obj = ModelTrainer()
     # Initiate model training and print the results
-    print(model_trainer_obj.initiate_model_training(
+    r2_square = model_trainer_obj.initiate_model_training(
         x_train_array=x_train_array,
         y_train_array=y_train_array,
         x_test_array=x_test_array,
         y_test_array=y_test_array
-    ))
+    )
+    print(r2_square)
+
+    # Create a ModelDistiller object
+    model_distiller_obj = ModelDistiller()
+    # Distill the trained model into a compact surrogate and print the fidelity/speed report
+    distillation_report = model_distiller_obj.initiate_model_distillation(
+        train_data_path=train_path, test_data_path=test_path)
+    print(distillation_report)
+
+    # Create a ModelOptimizer object
+    model_optimizer_obj = ModelOptimizer()
+    # Prune, quantize and pack the trained tree model and print the size/accuracy report
+    print(model_optimizer_obj.initiate_model_optimization(test_data_path=test_path))
+
+    # Create an ExplainerBuilder object
+    explainer_builder_obj = ExplainerBuilder()
+    # Precompute the explainer of every model variant and print their max deviation from the models
+    print(explainer_builder_obj.initiate_explainer_build(train_data_path=train_path))
+
+    # Publish this run's artifacts as a new immutable registry version
+    run_artifacts = [
+        os.path.join("artifacts", file_name)
+        for file_name in ["model.pkl", "Preprocessor.pkl", "reference_profile.json", "distilled_model.pkl",
+                          "optimized_model.pkl", "explainer.pkl", "distilled_explainer.pkl",
+                          "optimized_explainer.pkl", "distillation_report.json", "optimization_report.json"]
+        if os.path.exists(os.path.join("artifacts", file_name))
+    ]
+    version = ModelRegistry().publish(files=run_artifacts, metrics={"test_r2": float(r2_square)})
+    # Make it CURRENT only once it loads and answers a warm-up prediction
+    print(ModelServer().activate(version, promote=True).result())
@@ -15,11 +15,13 @@ from source.exception import CustomException
 from source.logger import logging
 import os
 
-from source.utils import save_object
+from source.utils import save_object, get_feature_domain
+from source.pipeline.drift_monitor import build_reference_profile, save_reference_profile
 
 @dataclass
 class DataTransformationConfig:
     preprocessor_path = os.path.join("artifacts", "Preprocessor.pkl")
+    reference_profile_path = os.path.join("artifacts", "reference_profile.json")
     logging.info("Defined the preprocessor path.")
 
 class DataTransformation:
@@ -82,6 +84,11 @@ class DataTransformation:
             save_object(preprocessor, self.preprocessor_path.preprocessor_path)
             logging.info("Saved the preprocessor object successfully.")
 
+            # Save the training input distribution next to the preprocessor for drift monitoring
+            num_features, cat_domain = get_feature_domain(preprocessor)
+            reference_profile = build_reference_profile(x_train, num_features, list(cat_domain))
+            save_reference_profile(reference_profile, self.preprocessor_path.reference_profile_path)
+
             # Transform training and testing data
             x_train_array = preprocessor.transform(x_train).toarray()
             y_train_array = np.array(y_train)
@@ -0,0 +1,126 @@
+# explainer_builder.py
+
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from source.exception import CustomException
+from source.logger import logging
+from source.components.model_optimizer import extract_trees, pack_trees
+from source.pipeline.explainer import PredictionExplainer
+from source.pipeline.flat_ensemble import FlatTreeEnsemble
+from source.utils import save_object, load_object, get_feature_domain
+
+# Configuration class for the explainer build paths
+@dataclass
+class ExplainerBuilderConfig:
+    trained_model_file_path: str = os.path.join("artifacts", "model.pkl")
+    distilled_model_file_path: str = os.path.join("artifacts", "distilled_model.pkl")
+    optimized_model_file_path: str = os.path.join("artifacts", "optimized_model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "Preprocessor.pkl")
+    explainer_file_path: str = os.path.join("artifacts", "explainer.pkl")
+    distilled_explainer_file_path: str = os.path.join("artifacts", "distilled_explainer.pkl")
+    optimized_explainer_file_path: str = os.path.join("artifacts", "optimized_explainer.pkl")
+
+# Explainer Builder class responsible for precomputing everything /explain needs
+class ExplainerBuilder:
+    def __init__(self):
+        # Initialize the explainer builder configuration
+        self.explainer_builder_config = ExplainerBuilderConfig()
+
+    # Method to map every transformed column back to the input it came from
+    def get_column_groups(self, preprocessor):
+        num_features, cat_domain = get_feature_domain(preprocessor)
+        input_features = num_features + list(cat_domain)
+        column_groups = list(range(len(num_features)))
+        for i, categories in enumerate(cat_domain.values()):
+            column_groups.extend([len(num_features) + i] * len(categories))
+        return input_features, column_groups
+
+    # Method to build the explainer of one model; None when the model type cannot be explained
+    def build_explainer(self, model, x_train_array, input_features, column_groups):
+        if isinstance(model, FlatTreeEnsemble):
+            # The optimized model already is a packed ensemble, explain exactly what is served
+            return PredictionExplainer(
+                input_features=input_features,
+                column_groups=column_groups,
+                expected_value=model.expected_value,
+                flat_ensemble=model,
+            )
+
+        if hasattr(model, "coef_"):
+            # Linear model: contributions are measured against the training means
+            coefficients = np.ravel(model.coef_)
+            feature_means = x_train_array.mean(axis=0)
+            return PredictionExplainer(
+                input_features=input_features,
+                column_groups=column_groups,
+                expected_value=float(np.ravel(model.intercept_)[0] + coefficients @ feature_means),
+                coefficients=coefficients,
+                feature_means=feature_means,
+            )
+
+        try:
+            trees, tree_weights, _ = extract_trees(model)
+        except ValueError as e:
+            logging.warning(f"Cannot build an explainer: {e}")
+            return None
+
+        # Node values are the training means of each node, so they already are the background
+        without_base = pack_trees(trees, tree_weights, 0.0, x_train_array.shape[1])
+        base_score = float(np.mean(model.predict(x_train_array) - without_base.predict(x_train_array)))
+        flat_ensemble = pack_trees(trees, tree_weights, base_score, x_train_array.shape[1])
+        return PredictionExplainer(
+            input_features=input_features,
+            column_groups=column_groups,
+            expected_value=flat_ensemble.expected_value,
+            flat_ensemble=flat_ensemble,
+        )
+
+    # Method to initiate the explainer build for every model variant that was trained
+    def initiate_explainer_build(self, train_data_path):
+        try:
+            config = self.explainer_builder_config
+            preprocessor = load_object(file_path=config.preprocessor_path)
+
+            target = "rate"
+            train_data = pd.read_csv(train_data_path)
+            x_train_array = preprocessor.transform(train_data.drop(target, axis=1)).toarray()
+            input_features, column_groups = self.get_column_groups(preprocessor)
+
+            variants = {
+                "full": (config.trained_model_file_path, config.explainer_file_path),
+                "distilled": (config.distilled_model_file_path, config.distilled_explainer_file_path),
+                "optimized": (config.optimized_model_file_path, config.optimized_explainer_file_path),
+            }
+            max_abs_diffs = {}
+            for variant, (model_path, explainer_path) in variants.items():
+                explainer = None
+                if os.path.exists(model_path):
+                    model = load_object(file_path=model_path)
+                    explainer = self.build_explainer(model, x_train_array, input_features, column_groups)
+
+                if explainer is None:
+                    # Never leave the explainer of a previous run next to this run's model
+                    if os.path.exists(explainer_path):
+                        os.remove(explainer_path)
+                    logging.warning(f"No explainer for the {variant} model variant")
+                    continue
+
+                predictions, _ = explainer.explain(x_train_array)
+                max_abs_diffs[variant] = float(np.abs(predictions - model.predict(x_train_array)).max())
+                logging.info(f"Built {variant} {type(model).__name__} explainer, "
+                             f"max abs diff vs model: {max_abs_diffs[variant]}")
+
+                save_object(
+                    obj=explainer,
+                    file_path=explainer_path,
+                )
+            return max_abs_diffs
+
+        except Exception as e:
+            # Raise a custom exception with the error and system details
+            raise CustomException(e, sys)
@@ -0,0 +1,145 @@
+# model_distiller.py
+
+import os
+import sys
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import r2_score, mean_absolute_error
+from sklearn.tree import DecisionTreeRegressor
+
+from source.exception import CustomException
+from source.logger import logging
+from source.utils import save_object, load_object, measure_speed, get_feature_domain
+
+# Configuration class for model distillation paths and settings
+@dataclass
+class ModelDistillerConfig:
+    trained_model_file_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "Preprocessor.pkl")
+    distilled_model_file_path: str = os.path.join("artifacts", "distilled_model.pkl")
+    distillation_report_path: str = os.path.join("artifacts", "distillation_report.json")
+    n_domain_samples: int = 200000
+    min_fidelity: float = 0.95
+    random_state: int = 42
+
+# Model Distiller class responsible for compressing the trained model into a small surrogate
+class ModelDistiller:
+    def __init__(self):
+        # Initialize the model distiller configuration
+        self.model_distiller_config = ModelDistillerConfig()
+
+    # Method to sample the full input domain of the preprocessor
+    def sample_input_domain(self, preprocessor, train_data):
+        try:
+            rng = np.random.default_rng(self.model_distiller_config.random_state)
+            n_samples = self.model_distiller_config.n_domain_samples
+            num_features, cat_domain = get_feature_domain(preprocessor)
+
+            samples = {}
+            for feature, categories in cat_domain.items():
+                samples[feature] = rng.choice(categories, size=n_samples)
+
+            # Numeric inputs are heavy tailed, so sample them uniformly in log space
+            for feature in num_features:
+                low = max(float(train_data[feature].min()), 0.0)
+                high = float(train_data[feature].max())
+                samples[feature] = np.expm1(rng.uniform(np.log1p(low), np.log1p(high), size=n_samples))
+
+            domain_data = pd.DataFrame(samples)
+
+            # Keep the real rows as well so the surrogate is most faithful where traffic actually is
+            domain_data = pd.concat([domain_data, train_data[domain_data.columns]], ignore_index=True)
+            logging.info(f"Sampled {len(domain_data)} rows from the input domain")
+            return domain_data
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    # Method to initiate model distillation
+    def initiate_model_distillation(self, train_data_path, test_data_path):
+        try:
+            config = self.model_distiller_config
+            teacher = load_object(file_path=config.trained_model_file_path)
+            preprocessor = load_object(file_path=config.preprocessor_path)
+            logging.info("Loaded the teacher model and preprocessor")
+
+            target = "rate"
+            train_data = pd.read_csv(train_data_path).drop(target, axis=1)
+            test_data = pd.read_csv(test_data_path)
+            x_test_array = preprocessor.transform(test_data.drop(target, axis=1)).toarray()
+            y_test_array = np.array(test_data[target])
+
+            # Label the sampled domain with the teacher, exactly as the serving path would score it
+            domain_data = self.sample_input_domain(preprocessor, train_data)
+            x_domain = preprocessor.transform(domain_data).toarray()
+            y_domain = teacher.predict(x_domain)
+
+            # Hold out part of the domain to measure fidelity on unseen inputs
+            rng = np.random.default_rng(config.random_state)
+            order = rng.permutation(x_domain.shape[0])
+            n_holdout = len(order) // 5
+            holdout_idx, fit_idx = order[:n_holdout], order[n_holdout:]
+
+            students = {
+                "Decision Tree": DecisionTreeRegressor(max_depth=10, min_samples_leaf=5, random_state=config.random_state),
+                "Shallow Gradient Boosting": GradientBoostingRegressor(
+                    n_estimators=60, max_depth=4, learning_rate=0.2, random_state=config.random_state
+                ),
+            }
+
+            teacher_test_pred = teacher.predict(x_test_array)
+            report = {
+                "teacher": {
+                    "model": type(teacher).__name__,
+                    "test_r2": r2_score(y_test_array, teacher_test_pred),
+                    **measure_speed(teacher, x_test_array),
+                },
+                "students": {},
+            }
+
+            for student_name, student in students.items():
+                logging.info(f"Distilling into {student_name}")
+                student.fit(x_domain[fit_idx], y_domain[fit_idx])
+
+                holdout_pred = student.predict(x_domain[holdout_idx])
+                student_test_pred = student.predict(x_test_array)
+                report["students"][student_name] = {
+                    "model": type(student).__name__,
+                    "fidelity_r2": r2_score(y_domain[holdout_idx], holdout_pred),
+                    "fidelity_mae": mean_absolute_error(y_domain[holdout_idx], holdout_pred),
+                    "teacher_agreement_r2_on_test": r2_score(teacher_test_pred, student_test_pred),
+                    "test_r2": r2_score(y_test_array, student_test_pred),
+                    **measure_speed(student, x_test_array),
+                }
+                logging.info(f"{student_name} - {report['students'][student_name]}")
+
+            # Pick the fastest student that is faithful enough, otherwise the most faithful one
+            faithful = [
+                name for name, result in report["students"].items()
+                if result["fidelity_r2"] >= config.min_fidelity
+            ]
+            if faithful:
+                best_student_name = min(faithful, key=lambda name: report["students"][name]["row_latency_us"])
+            else:
+                best_student_name = max(report["students"], key=lambda name: report["students"][name]["fidelity_r2"])
+                logging.warning(f"No student reached fidelity {config.min_fidelity}, keeping the most faithful one")
+
+            report["selected_student"] = best_student_name
+            logging.info(f"Selected distilled model: {best_student_name}")
+
+            save_object(
+                obj=students[best_student_name],
+                file_path=config.distilled_model_file_path,
+            )
+            with open(config.distillation_report_path, "w") as f:
+                json.dump(report, f, indent=2)
+
+            return report
+
+        except Exception as e:
+            # Raise a custom exception with the error and system details
+            raise CustomException(e, sys)
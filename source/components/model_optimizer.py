@@ -0,0 +1,406 @@
+# model_optimizer.py
+
+import os
+import sys
+import json
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score
+
+from source.exception import CustomException
+from source.logger import logging
+from source.pipeline.flat_ensemble import FlatTreeEnsemble
+from source.utils import save_object, load_object, measure_speed
+
+# Configuration class for the post-training optimizer paths and settings
+@dataclass
+class ModelOptimizerConfig:
+    trained_model_file_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "Preprocessor.pkl")
+    optimized_model_file_path: str = os.path.join("artifacts", "optimized_model.pkl")
+    optimization_report_path: str = os.path.join("artifacts", "optimization_report.json")
+    r2_tolerance: float = 0.005
+    quantize_values: bool = True
+    selection_fraction: float = 0.5
+    random_state: int = 42
+
+
+def _float32_threshold(threshold, strict):
+    """
+    Convert split thresholds to float32 so that `x <= threshold` keeps the original decision.
+
+    sklearn sends `x <= t` left on float32 inputs, xgboost sends `x < t` left.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    threshold32 = threshold.astype(np.float32)
+    if strict:
+        return np.nextafter(threshold32, np.float32(-np.inf))
+    too_high = threshold32.astype(np.float64) > threshold
+    threshold32[too_high] = np.nextafter(threshold32[too_high], np.float32(-np.inf))
+    return threshold32
+
+
+def _sklearn_tree(estimator, feature_map=None):
+    tree = estimator.tree_
+    left = tree.children_left.astype(np.int64)
+    is_leaf = left < 0
+    feature = np.where(is_leaf, 0, tree.feature).astype(np.int64)
+    if feature_map is not None:
+        feature = np.asarray(feature_map)[feature]
+    missing_go_to_left = getattr(tree, "missing_go_to_left", None)
+    return {
+        "feature": feature,
+        "threshold": _float32_threshold(np.where(is_leaf, 0.0, tree.threshold), strict=False),
+        "left": left,
+        "right": tree.children_right.astype(np.int64),
+        "default_left": (np.zeros(len(left), dtype=bool) if missing_go_to_left is None
+                         else np.asarray(missing_go_to_left, dtype=bool)),
+        "value": tree.value[:, 0, 0].astype(np.float64),
+    }
+
+
+def _xgboost_trees(model):
+    booster = model.get_booster()
+    feature_names = booster.feature_names
+    trees_df = booster.trees_to_dataframe()
+
+    trees = []
+    for _, tree_df in trees_df.groupby("Tree", sort=True):
+        tree_df = tree_df.reset_index(drop=True)
+        position = {node_id: i for i, node_id in enumerate(tree_df["ID"])}
+        is_leaf = (tree_df["Feature"] == "Leaf").to_numpy()
+
+        feature = np.zeros(len(tree_df), dtype=np.int64)
+        left = np.full(len(tree_df), -1, dtype=np.int64)
+        right = np.full(len(tree_df), -1, dtype=np.int64)
+        default_left = np.zeros(len(tree_df), dtype=bool)
+        for i, row in enumerate(tree_df.itertuples(index=False)):
+            if is_leaf[i]:
+                continue
+            feature[i] = feature_names.index(row.Feature) if feature_names else int(row.Feature[1:])
+            left[i] = position[row.Yes]
+            right[i] = position[row.No]
+            default_left[i] = row.Missing == row.Yes
+
+        # Internal nodes hold the cover-weighted mean of their subtree, as sklearn does
+        cover = tree_df["Cover"].to_numpy(dtype=np.float64)
+        value = np.where(is_leaf, tree_df["Gain"].to_numpy(dtype=np.float64), 0.0)
+        stack, visited = [0], np.zeros(len(tree_df), dtype=bool)
+        while stack:
+            node = stack[-1]
+            if is_leaf[node] or visited[node]:
+                stack.pop()
+                if not is_leaf[node]:
+                    total_cover = cover[left[node]] + cover[right[node]]
+                    value[node] = (cover[left[node]] * value[left[node]]
+                                   + cover[right[node]] * value[right[node]]) / max(total_cover, 1e-12)
+                continue
+            visited[node] = True
+            stack.extend([left[node], right[node]])
+
+        trees.append({
+            "feature": feature,
+            "threshold": _float32_threshold(np.where(is_leaf, 0.0, tree_df["Split"].fillna(0.0)), strict=True),
+            "left": left,
+            "right": right,
+            "default_left": default_left,
+            "value": value,
+        })
+    return trees
+
+
+def _catboost_trees(model):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "model.json")
+        model.save_model(model_path, format="json")
+        with open(model_path) as f:
+            model_json = json.load(f)
+
+    if model_json["features_info"].get("categorical_features") or "oblivious_trees" not in model_json:
+        raise ValueError(f"{type(model).__name__} with categorical features or non-oblivious trees is not supported")
+    float_features = model_json["features_info"]["float_features"]
+    scale, _ = model_json.get("scale_and_bias", [1.0, [0.0]])
+
+    trees = []
+    for oblivious_tree in model_json["oblivious_trees"]:
+        splits = oblivious_tree["splits"]
+        depth = len(splits)
+        n_nodes = 2 ** (depth + 1) - 1
+        n_internal = 2 ** depth - 1
+        leaf_values = np.asarray(oblivious_tree["leaf_values"], dtype=np.float64)
+        leaf_weights = np.asarray(oblivious_tree["leaf_weights"], dtype=np.float64)
+
+        # Unroll the oblivious tree into a complete binary tree in breadth-first order.
+        # Level l tests splits[l], and going right (x > border) sets bit l of the leaf index.
+        feature = np.zeros(n_nodes, dtype=np.int64)
+        threshold = np.zeros(n_nodes, dtype=np.float64)
+        left = np.full(n_nodes, -1, dtype=np.int64)
+        right = np.full(n_nodes, -1, dtype=np.int64)
+        value = np.zeros(n_nodes, dtype=np.float64)
+        weight = np.zeros(n_nodes, dtype=np.float64)
+        leaf_index = np.zeros(n_nodes, dtype=np.int64)
+        for node in range(n_internal):
+            level = int(np.log2(node + 1))
+            split = splits[level]
+            feature[node] = float_features[split["float_feature_index"]]["flat_feature_index"]
+            threshold[node] = split["border"]
+            left[node], right[node] = 2 * node + 1, 2 * node + 2
+            leaf_index[left[node]] = leaf_index[node]
+            leaf_index[right[node]] = leaf_index[node] | (1 << level)
+        value[n_internal:] = leaf_values[leaf_index[n_internal:]]
+        weight[n_internal:] = leaf_weights[leaf_index[n_internal:]]
+
+        # Internal nodes hold the weighted mean of their subtree, as sklearn does
+        for node in range(n_internal - 1, -1, -1):
+            weight[node] = weight[left[node]] + weight[right[node]]
+            value[node] = ((weight[left[node]] * value[left[node]] + weight[right[node]] * value[right[node]])
+                           / weight[node] if weight[node] > 0 else (value[left[node]] + value[right[node]]) / 2)
+
+        trees.append({
+            "feature": feature,
+            "threshold": _float32_threshold(threshold, strict=False),
+            "left": left,
+            "right": right,
+            "default_left": np.zeros(n_nodes, dtype=bool),
+            "value": value,
+        })
+    return trees, float(scale)
+
+
+def extract_trees(model):
+    """
+    Read the trees out of a fitted tree model.
+
+    Returns:
+        trees: List of per-tree node arrays, leaves have left == right == -1.
+        tree_weights: Weight of every tree in the ensemble output.
+        averaging: True when the ensemble averages its trees instead of adding them.
+    """
+    if hasattr(model, "estimator_weights_"):
+        # AdaBoost combines its trees with a weighted median, which is not additive
+        raise ValueError(f"{type(model).__name__} is not an additive tree ensemble")
+    if hasattr(model, "get_booster"):
+        trees = _xgboost_trees(model)
+        return trees, np.ones(len(trees)), False
+    if hasattr(model, "get_all_params"):
+        trees, scale = _catboost_trees(model)
+        return trees, np.full(len(trees), scale), False
+    if hasattr(model, "estimators_features_"):
+        trees = [_sklearn_tree(estimator, feature_map)
+                 for estimator, feature_map in zip(model.estimators_, model.estimators_features_)]
+        return trees, np.full(len(trees), 1.0 / len(trees)), True
+    if hasattr(model, "estimators_") and hasattr(model, "learning_rate"):
+        trees = [_sklearn_tree(estimator) for estimator in np.ravel(model.estimators_)]
+        return trees, np.full(len(trees), float(model.learning_rate)), False
+    if hasattr(model, "estimators_"):
+        trees = [_sklearn_tree(estimator) for estimator in model.estimators_]
+        return trees, np.full(len(trees), 1.0 / len(trees)), True
+    if hasattr(model, "tree_"):
+        return [_sklearn_tree(model)], np.ones(1), False
+    raise ValueError(f"{type(model).__name__} is not a supported tree model")
+
+
+def _tree_depth(tree):
+    depth, max_depth = {0: 0}, 0
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        if tree["left"][node] < 0:
+            max_depth = max(max_depth, depth[node])
+            continue
+        for child in (tree["left"][node], tree["right"][node]):
+            depth[child] = depth[node] + 1
+            stack.append(child)
+    return max_depth
+
+
+def pack_trees(trees, tree_weights, base_score, n_features, quantize_values=False):
+    """
+    Pack trees into a FlatTreeEnsemble, folding the tree weights into the leaf values.
+    """
+    offsets = np.cumsum([0] + [len(tree["feature"]) for tree in trees])
+    feature, threshold, left, right, default_left, value = [], [], [], [], [], []
+    for tree, weight, offset in zip(trees, tree_weights, offsets):
+        node_idx = np.arange(len(tree["feature"])) + offset
+        is_leaf = tree["left"] < 0
+        feature.append(tree["feature"])
+        threshold.append(tree["threshold"])
+        left.append(np.where(is_leaf, node_idx, tree["left"] + offset))
+        right.append(np.where(is_leaf, node_idx, tree["right"] + offset))
+        default_left.append(tree["default_left"])
+        value.append(tree["value"] * weight)
+
+    value = np.concatenate(value)
+    value_scale = None
+    if quantize_values:
+        value_scale = np.float32(max(np.abs(value).max(), 1e-12) / np.iinfo(np.int16).max)
+        value = np.round(value / value_scale).astype(np.int16)
+    else:
+        value = value.astype(np.float32)
+
+    default_left = np.concatenate(default_left)
+    return FlatTreeEnsemble(
+        feature=np.concatenate(feature).astype(np.int16),
+        threshold=np.concatenate(threshold).astype(np.float32),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        value=value,
+        roots=offsets[:-1].astype(np.int32),
+        base_score=base_score,
+        max_depth=max(_tree_depth(tree) for tree in trees),
+        n_features=n_features,
+        default_left=default_left if default_left.any() else None,
+        value_scale=value_scale,
+    )
+
+
+def prune_trees(per_tree, tree_weights, base_score, y_true, r2_tolerance, averaging):
+    """
+    Greedily drop the tree whose removal hurts R2 least until the loss would exceed r2_tolerance.
+
+    Args:
+        per_tree: Unweighted prediction of every tree, shape (n_rows, n_trees).
+        tree_weights: Weight of every tree in the full ensemble.
+        base_score: Constant added to the ensemble output.
+        y_true: Target values used to score the pruned ensembles.
+        r2_tolerance: Largest allowed drop in R2 compared to the full ensemble.
+        averaging: True when the ensemble averages its trees instead of adding them.
+
+    Returns:
+        keep: Boolean mask of the trees to keep.
+    """
+    contributions = per_tree * tree_weights if not averaging else per_tree
+    total_ss = ((y_true - y_true.mean()) ** 2).sum()
+
+    def r2(predictions):
+        return 1 - ((y_true[:, None] - predictions) ** 2).sum(axis=0) / total_ss
+
+    keep = np.ones(per_tree.shape[1], dtype=bool)
+    full_sum = contributions.sum(axis=1)
+    full_prediction = full_sum / len(keep) if averaging else full_sum
+    baseline_r2 = r2((full_prediction + base_score)[:, None])[0]
+
+    while keep.sum() > 1:
+        candidates = np.flatnonzero(keep)
+        kept_sum = contributions[:, keep].sum(axis=1)
+        # Score every single-tree removal at once
+        candidate_predictions = kept_sum[:, None] - contributions[:, candidates]
+        if averaging:
+            candidate_predictions /= len(candidates) - 1
+        candidate_r2 = r2(candidate_predictions + base_score)
+
+        best = np.argmax(candidate_r2)
+        if baseline_r2 - candidate_r2[best] > r2_tolerance:
+            break
+        keep[candidates[best]] = False
+
+    return keep
+
+
+# Model Optimizer class responsible for pruning, quantizing and packing the trained tree model
+class ModelOptimizer:
+    def __init__(self):
+        # Initialize the model optimizer configuration
+        self.model_optimizer_config = ModelOptimizerConfig()
+
+    # Method to initiate model optimization
+    def initiate_model_optimization(self, test_data_path):
+        try:
+            config = self.model_optimizer_config
+            model = load_object(file_path=config.trained_model_file_path)
+            preprocessor = load_object(file_path=config.preprocessor_path)
+
+            target = "rate"
+            test_data = pd.read_csv(test_data_path)
+            x_test_array = preprocessor.transform(test_data.drop(target, axis=1)).toarray()
+            y_test_array = np.array(test_data[target], dtype=np.float64)
+
+            try:
+                trees, tree_weights, averaging = extract_trees(model)
+            except ValueError as e:
+                logging.warning(f"Skipping model optimization: {e}")
+                # Do not leave an optimized model of a previous run next to this run's model
+                if os.path.exists(config.optimized_model_file_path):
+                    os.remove(config.optimized_model_file_path)
+                report = {"model": type(model).__name__, "skipped": str(e)}
+                with open(config.optimization_report_path, "w") as f:
+                    json.dump(report, f, indent=2)
+                return report
+            logging.info(f"Extracted {len(trees)} trees from {type(model).__name__}")
+
+            # Trees are selected on one part of the test set and the result is reported on the other,
+            # otherwise the greedy selection overfits the rows it is scored on
+            rng = np.random.default_rng(config.random_state)
+            order = rng.permutation(x_test_array.shape[0])
+            n_selection = int(len(order) * config.selection_fraction)
+            selection_idx, holdout_idx = order[:n_selection], order[n_selection:]
+            x_selection, y_selection = x_test_array[selection_idx], y_test_array[selection_idx]
+            x_holdout, y_holdout = x_test_array[holdout_idx], y_test_array[holdout_idx]
+
+            # Per-tree outputs of the unweighted, unquantized ensemble drive the pruning
+            unweighted = pack_trees(trees, np.ones(len(trees)), 0.0, x_test_array.shape[1])
+            per_tree = unweighted.predict_per_tree(x_selection).astype(np.float64)
+            selection_model_pred = model.predict(x_selection)
+            base_score = float(np.mean(selection_model_pred - per_tree @ tree_weights))
+
+            keep = prune_trees(
+                per_tree=per_tree,
+                tree_weights=tree_weights,
+                base_score=base_score,
+                y_true=y_selection,
+                r2_tolerance=config.r2_tolerance,
+                averaging=averaging,
+            )
+            kept_trees = [tree for tree, kept in zip(trees, keep) if kept]
+            kept_weights = np.full(keep.sum(), 1.0 / keep.sum()) if averaging else tree_weights[keep]
+            logging.info(f"Pruned the ensemble from {len(trees)} to {len(kept_trees)} trees")
+
+            selection_r2 = r2_score(y_selection, selection_model_pred)
+            pruned = pack_trees(kept_trees, kept_weights, base_score, x_test_array.shape[1])
+
+            optimized = pruned
+            if config.quantize_values:
+                quantized = pack_trees(kept_trees, kept_weights, base_score, x_test_array.shape[1],
+                                       quantize_values=True)
+                if selection_r2 - r2_score(y_selection, quantized.predict(x_selection)) <= config.r2_tolerance:
+                    optimized = quantized
+                else:
+                    logging.warning("int16 leaf values exceed the R2 tolerance, keeping float32 leaves")
+
+            # Everything reported below is measured on the held-out rows only
+            holdout_model_pred = model.predict(x_holdout)
+            report = {
+                "model": type(model).__name__,
+                "r2_tolerance": config.r2_tolerance,
+                "n_selection_rows": len(selection_idx),
+                "n_holdout_rows": len(holdout_idx),
+                "n_trees_before": len(trees),
+                "n_trees_after": len(kept_trees),
+                "n_nodes_after": optimized.n_nodes,
+                "quantized_values": optimized.value_scale is not None,
+                "test_r2_before": r2_score(y_holdout, holdout_model_pred),
+                "test_r2_pruned": r2_score(y_holdout, pruned.predict(x_holdout)),
+                "test_r2_after": r2_score(y_holdout, optimized.predict(x_holdout)),
+                "max_abs_diff_vs_model": float(np.abs(optimized.predict(x_holdout) - holdout_model_pred).max()),
+                "before": measure_speed(model, x_holdout),
+                "after": measure_speed(optimized, x_holdout),
+            }
+            logging.info(f"Model optimization report: {report}")
+            if report["test_r2_before"] - report["test_r2_after"] > config.r2_tolerance:
+                logging.warning("The optimized model loses more R2 on the held-out rows than the tolerance allows")
+
+            save_object(
+                obj=optimized,
+                file_path=config.optimized_model_file_path,
+            )
+            with open(config.optimization_report_path, "w") as f:
+                json.dump(report, f, indent=2)
+
+            return report
+
+        except Exception as e:
+            # Raise a custom exception with the error and system details
+            raise CustomException(e, sys)
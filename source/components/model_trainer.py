@@ -4,28 +4,16 @@ import os
 import sys
 from dataclasses import dataclass
 
-from sklearn.ensemble import (
-    AdaBoostRegressor,
-    GradientBoostingRegressor,
-    RandomForestRegressor,
-    ExtraTreesRegressor,
-    BaggingRegressor
-)
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import r2_score
-from sklearn.svm import SVR
-from sklearn.tree import DecisionTreeRegressor
-from xgboost import XGBRegressor
-from catboost import CatBoostRegressor
-
 from source.exception import CustomException
 from source.logger import logging
 from source.utils import save_object, model_training
+from source.pipeline.drift_monitor import add_prediction_reference
 
 # Configuration class for model trainer paths
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path: str = os.path.join("artifacts", "model.pkl")
+    reference_profile_path: str = os.path.join("artifacts", "reference_profile.json")
 
 # Model Trainer class responsible for training and evaluating models
 class ModelTrainer:
@@ -36,6 +24,21 @@ class ModelTrainer:
     # Method to initiate model training
     def initiate_model_training(self, x_train_array, y_train_array, x_test_array, y_test_array):
         try:
+            # Model libraries are imported here so that importing this module stays cheap
+            from sklearn.ensemble import (
+                AdaBoostRegressor,
+                GradientBoostingRegressor,
+                RandomForestRegressor,
+                ExtraTreesRegressor,
+                BaggingRegressor
+            )
+            from sklearn.linear_model import LinearRegression
+            from sklearn.metrics import r2_score
+            from sklearn.svm import SVR
+            from sklearn.tree import DecisionTreeRegressor
+            from xgboost import XGBRegressor
+            from catboost import CatBoostRegressor
+
             # Define the training and testing arrays
             self.x_train_array = x_train_array
             self.y_train_array = y_train_array
@@ -145,6 +148,16 @@ class ModelTrainer:
                 file_path=self.model_trainer_config.trained_model_file_path,
             )
 
+            # Add the training prediction distribution to the drift reference profile
+            if os.path.exists(self.model_trainer_config.reference_profile_path):
+                add_prediction_reference(
+                    file_path=self.model_trainer_config.reference_profile_path,
+                    predictions=best_model.predict(x_train_array),
+                )
+            else:
+                logging.warning(f"No reference profile at {self.model_trainer_config.reference_profile_path}, "
+                                "skipping the prediction reference for drift monitoring")
+
             # Predict on the test set and compute the R2 score
             predicted = best_model.predict(x_test_array)
             r2_square = r2_score(y_test_array, predicted)
@@ -0,0 +1,171 @@
+# table_materializer.py
+
+import os
+import sys
+import json
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from source.exception import CustomException
+from source.logger import logging
+from source.pipeline.predict_pipeline import PredictPipeline
+from source.pipeline.model_registry import ModelRegistry
+from source.pipeline.model_server import LEGACY_VERSION
+from source.pipeline.prediction_table import PredictionTable, PredictionTableConfig
+from source.utils import load_object, get_feature_domain
+
+# Configuration class for materializing the prediction table
+@dataclass
+class TableMaterializerConfig:
+    preprocessor_path: str = os.path.join("artifacts", "Preprocessor.pkl")
+    train_data_path: str = os.path.join("artifacts", "train.csv")
+    test_data_path: str = os.path.join("artifacts", "test.csv")
+    table_config: PredictionTableConfig = None
+    n_votes_bins: int = 32
+    n_cost_bins: int = 24
+    table_dtype: str = "float16"
+    rows_per_chunk: int = 500000
+    n_error_samples: int = 20000
+    random_state: int = 42
+
+    def __post_init__(self):
+        self.table_config = self.table_config or PredictionTableConfig()
+
+# Table Materializer class responsible for scoring the full input grid offline
+class TableMaterializer:
+    def __init__(self, model_version=None):
+        # Initialize the table materializer configuration
+        self.table_materializer_config = TableMaterializerConfig()
+
+        # Score the registry's CURRENT version (or the given one), the legacy artifacts/ files otherwise
+        registry = ModelRegistry()
+        self.model_version = model_version or registry.current_version() or LEGACY_VERSION
+        if self.model_version == LEGACY_VERSION:
+            self.predict_pipeline = PredictPipeline()
+        else:
+            registry.verify(self.model_version)
+            self.predict_pipeline = PredictPipeline(registry.get_pipeline_config(self.model_version))
+            self.table_materializer_config.preprocessor_path = self.predict_pipeline.config.preprocessor_path
+
+    # Method to measure how far the interpolated table is from the live model
+    def measure_error(self, table, cat_domain, test_data):
+        try:
+            config = self.table_materializer_config
+            rng = np.random.default_rng(config.random_state)
+            n_samples = config.n_error_samples
+
+            # Random off-grid points anywhere in the domain, plus the real test rows
+            samples = {feature: rng.choice(categories, size=n_samples) for feature, categories in cat_domain.items()}
+            samples["votes"] = np.expm1(rng.uniform(table.votes_axis[0], table.votes_axis[-1], size=n_samples))
+            samples["cost"] = np.expm1(rng.uniform(table.cost_axis[0], table.cost_axis[-1], size=n_samples))
+            eval_data = pd.concat([pd.DataFrame(samples), test_data[list(samples)]], ignore_index=True)
+
+            looked_up = table.lookup(eval_data)
+            covered = ~np.isnan(looked_up)
+            live = self.predict_pipeline.predict(eval_data[covered])
+            abs_error = np.abs(looked_up[covered] - live)
+
+            return {
+                "n_samples": int(covered.sum()),
+                "coverage": float(covered.mean()),
+                "max_abs_error": float(abs_error.max()),
+                "p99_abs_error": float(np.percentile(abs_error, 99)),
+                "mean_abs_error": float(abs_error.mean()),
+            }
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    # Method to initiate materialization of the prediction table
+    def initiate_materialization(self):
+        try:
+            config = self.table_materializer_config
+            preprocessor = load_object(file_path=config.preprocessor_path)
+            _, cat_domain = get_feature_domain(preprocessor)
+            cat_features = list(cat_domain)
+            cat_shape = tuple(len(cat_domain[feature]) for feature in cat_features)
+            n_combos = int(np.prod(cat_shape))
+
+            # Numeric axes are spaced evenly in log1p space over the training range
+            train_data = pd.read_csv(config.train_data_path)
+            votes_axis = np.linspace(np.log1p(max(train_data["votes"].min(), 0)),
+                                     np.log1p(train_data["votes"].max()), config.n_votes_bins)
+            cost_axis = np.linspace(np.log1p(max(train_data["cost"].min(), 0)),
+                                    np.log1p(train_data["cost"].max()), config.n_cost_bins)
+            votes_grid, cost_grid = np.meshgrid(np.expm1(votes_axis), np.expm1(cost_axis), indexing="ij")
+            votes_grid, cost_grid = votes_grid.ravel(), cost_grid.ravel()
+            n_grid = len(votes_grid)
+            logging.info(f"Materializing {n_combos} categorical combinations x {n_grid} numeric grid points")
+
+            # A running API may have the current table memory-mapped, so every run writes a new file and
+            # only the metadata, which names the file, is swapped into place once the table is complete
+            table_root, table_ext = os.path.splitext(config.table_config.table_path)
+            table_path = f"{table_root}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{table_ext}"
+            os.makedirs(os.path.dirname(table_path), exist_ok=True)
+            table = np.lib.format.open_memmap(
+                table_path, mode="w+", dtype=config.table_dtype,
+                shape=(n_combos, config.n_votes_bins, config.n_cost_bins),
+            )
+
+            combos_per_chunk = max(config.rows_per_chunk // n_grid, 1)
+            for start in range(0, n_combos, combos_per_chunk):
+                stop = min(start + combos_per_chunk, n_combos)
+                cat_idx = np.unravel_index(np.arange(start, stop), cat_shape)
+                chunk = {
+                    feature: np.repeat(np.array(cat_domain[feature], dtype=object)[idx], n_grid)
+                    for feature, idx in zip(cat_features, cat_idx)
+                }
+                chunk["votes"] = np.tile(votes_grid, stop - start)
+                chunk["cost"] = np.tile(cost_grid, stop - start)
+
+                predictions = self.predict_pipeline.predict(pd.DataFrame(chunk))
+                table[start:stop] = np.asarray(predictions).reshape(stop - start, config.n_votes_bins,
+                                                                    config.n_cost_bins)
+                logging.info(f"Materialized combinations {start} to {stop} of {n_combos}")
+            table.flush()
+            del table
+
+            metadata = {
+                "cat_features": cat_features,
+                "categories": cat_domain,
+                "votes_axis": votes_axis.tolist(),
+                "cost_axis": cost_axis.tolist(),
+                "dtype": config.table_dtype,
+                "model_version": self.model_version,
+                "model_variant": self.predict_pipeline.config.model_variant,
+                "table_file": os.path.basename(table_path),
+            }
+            metadata_path = config.table_config.metadata_path
+            staging_config = PredictionTableConfig(table_path=table_path, metadata_path=metadata_path + ".tmp")
+            with open(staging_config.metadata_path, "w") as f:
+                json.dump(metadata, f, indent=2)
+
+            # Measure the error bound against the live model and store it with the table
+            test_data = pd.read_csv(config.test_data_path)
+            metadata["error_bound"] = self.measure_error(PredictionTable(staging_config), cat_domain, test_data)
+            with open(staging_config.metadata_path, "w") as f:
+                json.dump(metadata, f, indent=2)
+
+            previous_table_path = PredictionTable.get_table_path(config.table_config)
+            os.replace(staging_config.metadata_path, metadata_path)
+            # Processes that still map the previous table keep reading it until they reload
+            if previous_table_path is not None and os.path.abspath(previous_table_path) != os.path.abspath(table_path):
+                try:
+                    os.remove(previous_table_path)
+                except OSError:
+                    pass
+            logging.info(f"Prediction table of model version {self.model_version} error bound: {metadata['error_bound']}")
+
+            return metadata["error_bound"]
+
+        except Exception as e:
+            # Raise a custom exception with the error and system details
+            raise CustomException(e, sys)
+
+# Main execution: python -m source.components.table_materializer [model_version]
+if __name__ == "__main__":
+    table_materializer_obj = TableMaterializer(model_version=sys.argv[1] if len(sys.argv) > 1 else None)
+    print(table_materializer_obj.initiate_materialization())
@@ -1,19 +1,178 @@
+import atexit
+import glob
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
+import time
 from datetime import datetime
 
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-logs_path = os.path.join(os.getcwd(),"logs",LOG_FILE)
-os.makedirs(logs_path,exist_ok=True)
+# Every process writes its own file in logs/, so rotation never races between workers
+LOG_DIR = os.path.join(os.getcwd(), "logs")
+LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}_{os.getpid()}.log"
+LOG_FILE_PATH = os.path.join(LOG_DIR, LOG_FILE)
 
-LOG_FILE_PATH=os.path.join(logs_path,LOG_FILE)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_ROTATE_SECONDS = int(os.environ.get("LOG_ROTATE_SECONDS", 24 * 60 * 60))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+LOG_MAX_FILES = int(os.environ.get("LOG_MAX_FILES", 50))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s ",
-    level=logging.INFO
+# Share of hot-path records kept per level; records without extra={"hot_path": True} are always kept
+HOT_PATH_SAMPLE_RATES = {
+    logging.DEBUG: float(os.environ.get("LOG_HOT_PATH_DEBUG_SAMPLE_RATE", 0.0)),
+    logging.INFO: float(os.environ.get("LOG_HOT_PATH_INFO_SAMPLE_RATE", 0.01)),
+}
 
-)
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra` fields as top-level keys."""
+
+    def format(self, record):
+        payload = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        return json.dumps(payload, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotate when the file reaches max_bytes or when interval_seconds have passed, whichever comes first."""
+
+    def __init__(self, filename, max_bytes, interval_seconds, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.interval_seconds = interval_seconds
+        self.rollover_at = time.time() + interval_seconds
+
+    def shouldRollover(self, record):
+        if time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval_seconds
+
+
+class HotPathSampler(logging.Filter):
+    """Keep only a sample of the records marked hot_path, by level."""
+
+    def __init__(self, sample_rates):
+        super().__init__()
+        self.sample_rates = sample_rates
+
+    def filter(self, record):
+        if not getattr(record, "hot_path", False):
+            return True
+        return random.random() < self.sample_rates.get(record.levelno, 1.0)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records when the buffer is full instead of blocking the caller."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _is_process_running(pid):
+    if os.name == "nt":
+        # os.kill terminates the process on Windows, so only the file age protects active logs there
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _list_log_files():
+    """(mtime, path) of every log file, newest first."""
+    # Only plain files count: legacy per-run log directories also match the pattern.
+    # Other workers prune at the same time, so files may vanish at any point and are skipped.
+    log_files = []
+    for path in glob.glob(os.path.join(LOG_DIR, "*.log*")):
+        try:
+            if os.path.isfile(path):
+                log_files.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    return sorted(log_files, reverse=True)
+
+
+def _prune_old_logs():
+    now = time.time()
+    for mtime, log_file in _list_log_files()[LOG_MAX_FILES:]:
+        try:
+            # Never remove a file another live process may still be writing to
+            if now - mtime < LOG_ROTATE_SECONDS:
+                continue
+            pid_match = re.search(r"_(\d+)\.log(\.\d+)?$", os.path.basename(log_file))
+            if pid_match and _is_process_running(int(pid_match.group(1))):
+                continue
+            os.remove(log_file)
+        except OSError:
+            pass
+
+
+def _setup_logging():
+    os.makedirs(LOG_DIR, exist_ok=True)
+    _prune_old_logs()
+
+    file_handler = SizeAndTimeRotatingFileHandler(
+        LOG_FILE_PATH,
+        max_bytes=LOG_MAX_BYTES,
+        interval_seconds=LOG_ROTATE_SECONDS,
+        backup_count=LOG_BACKUP_COUNT,
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    # Callers only enqueue; formatting and disk writes happen on the listener thread
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    queue_handler.addFilter(HotPathSampler(HOT_PATH_SAMPLE_RATES))
+    listener = logging.handlers.QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+    listener.start()
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(LOG_LEVEL)
+    root_logger.addHandler(queue_handler)
+
+    def shutdown():
+        if queue_handler.dropped:
+            file_handler.handle(logging.makeLogRecord({
+                "msg": f"Dropped {queue_handler.dropped} log records because the log queue was full",
+                "levelno": logging.WARNING, "levelname": "WARNING", "name": __name__,
+            }))
+        listener.stop()
+
+    atexit.register(shutdown)
+    return queue_handler
+
+
+queue_handler = _setup_logging()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import threading
+from collections import deque
+from dataclasses import dataclass
+import numpy as np
+from source.exception import CustomException
+from source.logger import logging
+
+PREDICTION_FEATURE = "prediction"
+
+
+# Configuration class for serving-time drift monitoring
+@dataclass
+class DriftMonitorConfig:
+    reference_profile_path: str = os.path.join("artifacts", "reference_profile.json")
+    flush_interval_seconds: float = 1.0
+    max_pending: int = 100000
+
+
+def _numeric_profile(values, n_bins):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+    return {
+        "edges": edges.tolist(),
+        "frequencies": (counts / counts.sum()).tolist(),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "quantiles": {str(q): float(np.quantile(values, q)) for q in (0.05, 0.25, 0.5, 0.75, 0.95)},
+    }
+
+
+def build_reference_profile(data, num_features, cat_features, n_bins=20):
+    """
+    Summarize the training inputs as category frequencies and quantile-binned histograms.
+
+    Args:
+        data: DataFrame of raw training inputs.
+        num_features: Numeric columns, binned on their training quantiles.
+        cat_features: Categorical columns, profiled as category frequencies.
+        n_bins: Number of quantile bins per numeric column.
+
+    Returns:
+        profile: Dictionary that can be saved as JSON.
+    """
+    try:
+        profile = {"n_rows": int(len(data)), "n_bins": n_bins, "categorical": {}, "numeric": {}}
+        for feature in cat_features:
+            frequencies = data[feature].astype(str).value_counts(normalize=True)
+            profile["categorical"][feature] = {str(k): float(v) for k, v in frequencies.items()}
+        for feature in num_features:
+            profile["numeric"][feature] = _numeric_profile(data[feature], n_bins)
+        return profile
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def save_reference_profile(profile, file_path):
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            json.dump(profile, f, indent=2)
+        logging.info(f"Saved reference profile to {file_path}")
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def add_prediction_reference(file_path, predictions):
+    """Add the trained model's prediction distribution to a saved reference profile."""
+    try:
+        with open(file_path) as f:
+            profile = json.load(f)
+        profile["numeric"][PREDICTION_FEATURE] = _numeric_profile(predictions, profile["n_bins"])
+        save_reference_profile(profile, file_path)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def population_stability_index(expected, actual, epsilon=1e-4):
+    expected = np.asarray(expected, dtype=np.float64) + epsilon
+    actual = np.asarray(actual, dtype=np.float64) + epsilon
+    expected, actual = expected / expected.sum(), actual / actual.sum()
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class DriftMonitor:
+    """
+    Constant-memory comparison of live traffic against the training reference profile.
+
+    The request path only appends the raw observation to a bounded deque,
+    which is atomic and takes no lock; when it is full the oldest pending
+    observations are dropped. A background thread drains it in batches and
+    folds each batch into fixed-size count arrays: one bucket per known
+    category plus one for unseen values, and one bucket per reference quantile
+    bin for votes, cost and the predicted rating.
+    """
+
+    def __init__(self, config=None):
+        try:
+            self.config = config or DriftMonitorConfig()
+            with open(self.config.reference_profile_path) as f:
+                self.reference = json.load(f)
+
+            self.categories = {
+                feature: {category: i for i, category in enumerate(frequencies)}
+                for feature, frequencies in self.reference["categorical"].items()
+            }
+            self.edges = {
+                feature: np.array(profile["edges"], dtype=np.float64)
+                for feature, profile in self.reference["numeric"].items()
+            }
+            self.cat_counts = {feature: np.zeros(len(index) + 1) for feature, index in self.categories.items()}
+            self.num_counts = {feature: np.zeros(len(edges) + 1) for feature, edges in self.edges.items()}
+            self.num_min = {feature: np.inf for feature in self.edges}
+            self.num_max = {feature: -np.inf for feature in self.edges}
+            self.n_observations = 0
+
+            self._pending = deque(maxlen=self.config.max_pending)
+            self._update_lock = threading.Lock()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+            self._thread.start()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def record(self, inputs, prediction):
+        """Hot path: queue one observation (dict of raw inputs, predicted rating)."""
+        self._pending.append((inputs, prediction))
+
+    def _run(self):
+        while not self._stop.wait(self.config.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Drift monitor update failed: {e}")
+
+    def flush(self):
+        """Fold every pending observation into the sketches."""
+        batch = []
+        try:
+            while True:
+                batch.append(self._pending.popleft())
+        except IndexError:
+            pass
+        if not batch:
+            return
+
+        with self._update_lock:
+            for feature, index in self.categories.items():
+                unseen = len(index)
+                idx = np.fromiter((index.get(str(inputs[feature]), unseen) for inputs, _ in batch),
+                                  dtype=np.int64, count=len(batch))
+                self.cat_counts[feature] += np.bincount(idx, minlength=unseen + 1)
+
+            for feature, edges in self.edges.items():
+                if feature == PREDICTION_FEATURE:
+                    values = np.fromiter((prediction for _, prediction in batch), dtype=np.float64, count=len(batch))
+                else:
+                    values = np.fromiter((inputs[feature] for inputs, _ in batch), dtype=np.float64, count=len(batch))
+                self.num_counts[feature] += np.bincount(np.searchsorted(edges, values, side="right"),
+                                                        minlength=len(edges) + 1)
+                self.num_min[feature] = min(self.num_min[feature], float(values.min()))
+                self.num_max[feature] = max(self.num_max[feature], float(values.max()))
+
+            self.n_observations += len(batch)
+
+    def _estimate_quantile(self, feature, q):
+        """Interpolate a quantile inside the reference bins, bounded by the live min and max."""
+        counts = self.num_counts[feature]
+        bounds = np.concatenate([[self.num_min[feature]], self.edges[feature], [self.num_max[feature]]])
+        bounds = np.clip(bounds, self.num_min[feature], self.num_max[feature])
+        cumulative = np.cumsum(counts) / counts.sum()
+        bin_idx = min(int(np.searchsorted(cumulative, q)), len(counts) - 1)
+        below = cumulative[bin_idx - 1] if bin_idx > 0 else 0.0
+        within = (q - below) / max(cumulative[bin_idx] - below, 1e-12)
+        return float(bounds[bin_idx] + within * (bounds[bin_idx + 1] - bounds[bin_idx]))
+
+    @staticmethod
+    def _status(psi):
+        if psi < 0.1:
+            return "stable"
+        if psi < 0.25:
+            return "moderate"
+        return "significant"
+
+    def drift_report(self):
+        try:
+            self.flush()
+            with self._update_lock:
+                report = {"n_observations": self.n_observations, "categorical": {}, "numeric": {}}
+                if self.n_observations == 0:
+                    return report
+
+                for feature, index in self.categories.items():
+                    counts = self.cat_counts[feature]
+                    expected = list(self.reference["categorical"][feature].values()) + [0.0]
+                    psi = population_stability_index(expected, counts)
+                    report["categorical"][feature] = {
+                        "psi": psi,
+                        "status": self._status(psi),
+                        "unseen_share": float(counts[-1] / counts.sum()),
+                    }
+
+                for feature, counts in self.num_counts.items():
+                    reference = self.reference["numeric"][feature]
+                    psi = population_stability_index(reference["frequencies"], counts)
+                    report["numeric"][feature] = {
+                        "psi": psi,
+                        "status": self._status(psi),
+                        "reference_quantiles": reference["quantiles"],
+                        "live_quantiles": {q: self._estimate_quantile(feature, float(q)) for q in reference["quantiles"]},
+                    }
+                return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def reset(self):
+        with self._update_lock:
+            self._pending.clear()
+            for counts in list(self.cat_counts.values()) + list(self.num_counts.values()):
+                counts[:] = 0
+            self.num_min = {feature: np.inf for feature in self.edges}
+            self.num_max = {feature: -np.inf for feature in self.edges}
+            self.n_observations = 0
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,52 @@
+import sys
+import numpy as np
+from source.exception import CustomException
+
+
+class PredictionExplainer:
+    """
+    Per-feature contributions for the trained model, grouped back to the seven inputs.
+
+    Tree models are explained by path attribution on a FlatTreeEnsemble; linear
+    models by coefficient * (x - training mean). Both are built once at training
+    time, so serving only does one vectorized pass over the batch. For every row,
+    expected_value + contributions.sum() equals the explained prediction.
+    """
+
+    def __init__(self, input_features, column_groups, expected_value, flat_ensemble=None,
+                 coefficients=None, feature_means=None):
+        self.input_features = list(input_features)
+        self.column_groups = np.asarray(column_groups)
+        self.expected_value = float(expected_value)
+        self.flat_ensemble = flat_ensemble
+        self.coefficients = coefficients
+        self.feature_means = feature_means
+
+        # Transformed column -> input feature, as a matrix so grouping is one product
+        self.group_matrix = np.zeros((len(self.column_groups), len(self.input_features)))
+        self.group_matrix[np.arange(len(self.column_groups)), self.column_groups] = 1.0
+
+    def explain(self, data_scaled):
+        """
+        Explain a batch of preprocessed rows.
+
+        Returns:
+            predictions: Array of shape (n_rows,).
+            contributions: Array of shape (n_rows, n_inputs), ordered as input_features.
+        """
+        try:
+            if hasattr(data_scaled, "toarray"):
+                data_scaled = data_scaled.toarray()
+            data_scaled = np.asarray(data_scaled, dtype=np.float64)
+
+            if self.flat_ensemble is not None:
+                column_contributions = self.flat_ensemble.path_contributions(data_scaled)
+            else:
+                column_contributions = (data_scaled - self.feature_means) * self.coefficients
+
+            contributions = column_contributions @ self.group_matrix
+            predictions = self.expected_value + contributions.sum(axis=1)
+            return predictions, contributions
+
+        except Exception as e:
+            raise CustomException(e, sys)
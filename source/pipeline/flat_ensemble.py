@@ -0,0 +1,135 @@
+import sys
+import numpy as np
+from source.exception import CustomException
+
+
+class FlatTreeEnsemble:
+    """
+    Tree ensemble packed into contiguous flat arrays.
+
+    Every tree is stored back to back in the same node arrays. Leaves point at
+    themselves, so a whole batch walks all trees in lock step for max_depth
+    steps without any per-row branching. Leaf values already carry the tree
+    weight, so the prediction is the sum of the reached leaves plus base_score.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, base_score, max_depth,
+                 n_features, default_left=None, value_scale=None, chunk_size=2048):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.base_score = float(base_score)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.default_left = default_left
+        self.value_scale = value_scale
+        self.chunk_size = chunk_size
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _as_array(self, features):
+        if hasattr(features, "toarray"):
+            features = features.toarray()
+        features = np.asarray(features, dtype=np.float32)
+        if features.ndim != 2 or features.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {features.shape}")
+        return features
+
+    def _node_values(self, node_idx):
+        values = self.value[node_idx].astype(np.float32)
+        if self.value_scale is not None:
+            values *= self.value_scale
+        return values
+
+    def _walk(self, x):
+        """Yield the (n_rows, n_trees) node indices at every depth, starting from the roots."""
+        rows = np.arange(x.shape[0])[:, None]
+        node_idx = np.tile(self.roots, (x.shape[0], 1))
+        yield node_idx
+        for _ in range(self.max_depth):
+            x_values = x[rows, self.feature[node_idx]]
+            go_left = x_values <= self.threshold[node_idx]
+            if self.default_left is not None:
+                go_left |= np.isnan(x_values) & self.default_left[node_idx]
+            node_idx = np.where(go_left, self.left[node_idx], self.right[node_idx])
+            yield node_idx
+
+    def leaf_indices(self, features):
+        x = self._as_array(features)
+        for node_idx in self._walk(x):
+            pass
+        return node_idx
+
+    def predict_per_tree(self, features):
+        """Return the weighted leaf value reached in every tree, shape (n_rows, n_trees)."""
+        try:
+            x = self._as_array(features)
+            per_tree = np.empty((x.shape[0], self.n_trees), dtype=np.float32)
+            for start in range(0, x.shape[0], self.chunk_size):
+                stop = start + self.chunk_size
+                for node_idx in self._walk(x[start:stop]):
+                    pass
+                per_tree[start:stop] = self._node_values(node_idx)
+            return per_tree
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict(self, features):
+        try:
+            return self.predict_per_tree(features).sum(axis=1, dtype=np.float64) + self.base_score
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @property
+    def expected_value(self):
+        """Prediction before any split is taken: the weighted root values plus base_score."""
+        return float(self._node_values(self.roots).sum(dtype=np.float64) + self.base_score)
+
+    def path_contributions(self, features):
+        """
+        Attribute each prediction to the features split on along its decision paths.
+
+        Every step from a node to its child credits the change in node value to the
+        node's split feature, so expected_value + contributions.sum(axis=1) equals
+        predict(features).
+
+        Returns:
+            contributions: Array of shape (n_rows, n_features).
+        """
+        try:
+            x = self._as_array(features)
+            contributions = np.zeros((x.shape[0], self.n_features), dtype=np.float64)
+            for start in range(0, x.shape[0], self.chunk_size):
+                chunk = x[start:start + self.chunk_size]
+                n_rows = chunk.shape[0]
+                flat_rows = np.arange(n_rows)[:, None] * self.n_features
+                chunk_contributions = np.zeros(n_rows * self.n_features, dtype=np.float64)
+
+                parent_idx = parent_values = None
+                for node_idx in self._walk(chunk):
+                    node_values = self._node_values(node_idx)
+                    if parent_idx is not None:
+                        # Leaves point at themselves, so finished paths add a zero delta
+                        chunk_contributions += np.bincount(
+                            (flat_rows + self.feature[parent_idx]).ravel(),
+                            weights=(node_values - parent_values).ravel(),
+                            minlength=n_rows * self.n_features,
+                        )
+                    parent_idx, parent_values = node_idx, node_values
+
+                contributions[start:start + n_rows] = chunk_contributions.reshape(n_rows, self.n_features)
+            return contributions
+
+        except Exception as e:
+            raise CustomException(e, sys)
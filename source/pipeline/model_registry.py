@@ -0,0 +1,176 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from source.exception import CustomException
+from source.logger import logging
+from source.pipeline.predict_pipeline import PredictPipelineConfig
+
+
+# Configuration class for the versioned model registry
+@dataclass
+class ModelRegistryConfig:
+    registry_dir: str = os.path.join("artifacts", "registry")
+    current_file: str = "CURRENT"
+    routing_file: str = "ROUTING.json"
+    manifest_file: str = "manifest.json"
+
+
+def file_sha256(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Versioned, immutable model store.
+
+    Every training run is published into its own directory with a manifest of
+    file checksums. Directories are built under a temporary name and renamed
+    into place, and the CURRENT pointer is replaced atomically, so a reader
+    never sees a half-written version.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or ModelRegistryConfig()
+
+    def version_path(self, version):
+        return os.path.join(self.config.registry_dir, version)
+
+    def list_versions(self):
+        if not os.path.isdir(self.config.registry_dir):
+            return []
+        return sorted(
+            version for version in os.listdir(self.config.registry_dir)
+            if os.path.isfile(os.path.join(self.version_path(version), self.config.manifest_file))
+        )
+
+    def get_manifest(self, version):
+        try:
+            with open(os.path.join(self.version_path(version), self.config.manifest_file)) as f:
+                return json.load(f)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def current_version(self):
+        current_path = os.path.join(self.config.registry_dir, self.config.current_file)
+        if os.path.isfile(current_path):
+            with open(current_path) as f:
+                return f.read().strip()
+        versions = self.list_versions()
+        return versions[-1] if versions else None
+
+    def set_current(self, version):
+        try:
+            if version not in self.list_versions():
+                raise ValueError(f"Unknown model version: {version}")
+            current_path = os.path.join(self.config.registry_dir, self.config.current_file)
+            with open(current_path + ".tmp", "w") as f:
+                f.write(version)
+            os.replace(current_path + ".tmp", current_path)
+            logging.info(f"Registry CURRENT set to {version}")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_routing(self):
+        """Canary and shadow settings shared by every serving process."""
+        routing_path = os.path.join(self.config.registry_dir, self.config.routing_file)
+        routing = {"canary": None, "shadow": None}
+        if os.path.isfile(routing_path):
+            with open(routing_path) as f:
+                routing.update(json.load(f))
+        return routing
+
+    def update_routing(self, **changes):
+        try:
+            for key, value in changes.items():
+                version = value["version"] if isinstance(value, dict) else value
+                if version is not None and version not in self.list_versions():
+                    raise ValueError(f"Unknown model version for {key}: {version}")
+            routing = {**self.get_routing(), **changes}
+            os.makedirs(self.config.registry_dir, exist_ok=True)
+            routing_path = os.path.join(self.config.registry_dir, self.config.routing_file)
+            with open(routing_path + ".tmp", "w") as f:
+                json.dump(routing, f)
+            os.replace(routing_path + ".tmp", routing_path)
+            logging.info(f"Registry routing set to {routing}")
+            return routing
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def publish(self, files, metrics=None, make_current=False):
+        """
+        Copy a training run's artifacts into a new immutable version.
+
+        Args:
+            files: List of artifact paths to publish; they keep their file names.
+            metrics: Optional dictionary stored in the manifest.
+            make_current: Point CURRENT at the new version once it is in place, without loading it.
+                Prefer ModelServer.activate(version, promote=True), which only does so once it loads.
+
+        Returns:
+            The new version name.
+        """
+        try:
+            os.makedirs(self.config.registry_dir, exist_ok=True)
+            version = datetime.now().strftime('%Y%m%d_%H%M%S')
+            suffix = 1
+            while os.path.exists(self.version_path(version)):
+                version = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{suffix}"
+                suffix += 1
+
+            staging_path = os.path.join(self.config.registry_dir, f".{version}.tmp")
+            os.makedirs(staging_path)
+            manifest = {"version": version, "created_at": datetime.now().isoformat(),
+                        "metrics": metrics or {}, "files": {}}
+            for file_path in files:
+                file_name = os.path.basename(file_path)
+                target_path = os.path.join(staging_path, file_name)
+                shutil.copyfile(file_path, target_path)
+                os.chmod(target_path, 0o444)
+                manifest["files"][file_name] = file_sha256(target_path)
+
+            with open(os.path.join(staging_path, self.config.manifest_file), "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging_path, self.version_path(version))
+            logging.info(f"Published model version {version}: {list(manifest['files'])}")
+
+            if make_current:
+                self.set_current(version)
+            return version
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def verify(self, version):
+        """Check every file of a version against its manifest checksum."""
+        try:
+            manifest = self.get_manifest(version)
+            for file_name, checksum in manifest["files"].items():
+                if file_sha256(os.path.join(self.version_path(version), file_name)) != checksum:
+                    raise ValueError(f"Checksum mismatch for {file_name} in version {version}")
+            return manifest
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_pipeline_config(self, version):
+        version_path = self.version_path(version)
+        return PredictPipelineConfig(
+            model_path=os.path.join(version_path, "model.pkl"),
+            distilled_model_path=os.path.join(version_path, "distilled_model.pkl"),
+            optimized_model_path=os.path.join(version_path, "optimized_model.pkl"),
+            preprocessor_path=os.path.join(version_path, "Preprocessor.pkl"),
+            explainer_path=os.path.join(version_path, "explainer.pkl"),
+            distilled_explainer_path=os.path.join(version_path, "distilled_explainer.pkl"),
+            optimized_explainer_path=os.path.join(version_path, "optimized_explainer.pkl"),
+        )
@@ -0,0 +1,305 @@
+import os
+import sys
+import time
+import random
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from source.exception import CustomException
+from source.logger import logging
+from source.pipeline.model_registry import ModelRegistry
+from source.pipeline.predict_pipeline import CustomData, PredictPipeline
+from source.utils import load_object
+
+# Version name used when the registry is empty and the legacy artifacts/ files are served
+LEGACY_VERSION = "artifacts"
+
+
+def get_warmup_data():
+    return CustomData(
+        online_order="Yes",
+        book_table="No",
+        votes=775,
+        rest_type="Casual Dining",
+        cost=800,
+        type="Buffet",
+        city="Banashankari",
+    ).get_data_as_data_frame()
+
+
+# Configuration class for the model server
+@dataclass
+class ModelServerConfig:
+    watch_interval_seconds: float = float(os.environ.get("MODEL_WATCH_INTERVAL_SECONDS", 2.0))
+    max_pinned_versions: int = int(os.environ.get("MODEL_MAX_PINNED_VERSIONS", 2))
+    max_retry_backoff_seconds: float = float(os.environ.get("MODEL_MAX_RETRY_BACKOFF_SECONDS", 300.0))
+
+
+class ModelServer:
+    """
+    Holds the loaded model versions and routes requests between them.
+
+    Loading, warm-up and activation run on background threads. The request
+    path only reads plain attributes, and every change replaces a whole
+    reference (the version dict, the active version, the canary tuple), so
+    in-flight requests keep the pipeline they started with and never wait on
+    a lock.
+
+    The registry's CURRENT pointer and routing file are the source of truth:
+    every process watches them and follows changes made by any other process.
+    Versions loaded only for pinned requests are evicted least recently used
+    first once there are more than max_pinned_versions of them.
+    """
+
+    def __init__(self, registry=None, config=None):
+        self.registry = registry or ModelRegistry()
+        self.config = config or ModelServerConfig()
+        self.pipelines = {}
+        self.explainers = {}
+        self.active_version = None
+        self.canary = None
+        self.shadow_version = None
+        self._last_used = {}
+        self.last_activation = None
+        self._failed_versions = {}
+        self._switch_listeners = []
+        self._load_lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+        self._stop_watching = threading.Event()
+        self._watch_thread = None
+
+    def is_ready(self):
+        return self.active_version is not None
+
+    def load_version(self, version):
+        """Load and warm up a version if needed, then publish it to the request path."""
+        try:
+            pipeline = self.pipelines.get(version)
+            if pipeline is not None:
+                return pipeline
+
+            with self._load_lock:
+                pipeline = self.pipelines.get(version)
+                if pipeline is not None:
+                    return pipeline
+
+                if version == LEGACY_VERSION:
+                    pipeline = PredictPipeline()
+                else:
+                    if version not in self.registry.list_versions():
+                        raise KeyError(f"Unknown model version: {version}")
+                    self.registry.verify(version)
+                    pipeline = PredictPipeline(self.registry.get_pipeline_config(version))
+
+                pipeline.load()
+                pipeline.predict(get_warmup_data())
+                self._last_used[version] = time.monotonic()
+                self.pipelines = {**self.pipelines, version: pipeline}
+                logging.info(f"Loaded and warmed up model version {version}")
+                self._evict_pinned(keep=version)
+                return pipeline
+
+        except KeyError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _switch(self, version):
+        # Holding the load lock keeps the version from being evicted before it becomes active
+        with self._load_lock:
+            self.load_version(version)
+            previous_version = self.active_version
+            if previous_version != version:
+                self.active_version = version
+                logging.info(f"Active model version switched from {previous_version} to {version}")
+                for listener in self._switch_listeners:
+                    try:
+                        listener(version)
+                    except Exception as e:
+                        logging.error(f"Model switch listener failed for version {version}: {e}")
+        return version
+
+    def add_switch_listener(self, listener):
+        """Call listener(version) on the loader thread every time the active version changes."""
+        self._switch_listeners.append(listener)
+
+    def activate(self, version=None, promote=False):
+        """
+        Load a version on the background thread and switch to it once it is warm.
+
+        With promote=True the registry's CURRENT is pointed at the version only after it
+        loaded and answered the warm-up prediction, so a broken version never becomes the
+        version every worker follows. The outcome is kept in last_activation.
+        """
+        version = version or self.registry.current_version() or LEGACY_VERSION
+        self.last_activation = {"version": version, "promote": promote, "state": "loading", "error": None}
+
+        def load_and_switch():
+            try:
+                with self._load_lock:
+                    self.load_version(version)
+                    if promote:
+                        self.registry.set_current(version)
+                    self._switch(version)
+            except Exception as e:
+                self.last_activation = {**self.last_activation, "state": "failed", "error": str(e)}
+                logging.error(f"Failed to activate model version {version}: {e}")
+                raise
+            self.last_activation = {**self.last_activation, "state": "active"}
+            return version
+
+        return self._executor.submit(load_and_switch)
+
+    def _should_retry(self, version):
+        failure = self._failed_versions.get(version)
+        return failure is None or time.monotonic() >= failure[1]
+
+    def _record_failure(self, version):
+        # Exponential backoff, so a transient error is retried but a broken version is not hammered
+        n_failures = self._failed_versions.get(version, (0, 0.0))[0] + 1
+        backoff = min(self.config.watch_interval_seconds * 2 ** n_failures, self.config.max_retry_backoff_seconds)
+        self._failed_versions[version] = (n_failures, time.monotonic() + backoff)
+        return backoff
+
+    def _read_registry(self):
+        routing = self.registry.get_routing()
+        canary = routing["canary"]
+        canary = (canary["version"], float(canary["weight"])) if canary else None
+        return self.registry.current_version(), canary, routing["shadow"]
+
+    def sync_with_registry(self):
+        """Follow the registry's CURRENT version and canary/shadow routing in this process."""
+        current_version, canary, shadow_version = self._read_registry()
+
+        # Versions that failed to load are retried with a backoff instead of on every poll
+        for version in {current_version, canary and canary[0], shadow_version} - {None, *self.pipelines}:
+            if not self._should_retry(version):
+                continue
+            try:
+                self.load_version(version)
+                self._failed_versions.pop(version, None)
+            except Exception as e:
+                backoff = self._record_failure(version)
+                logging.error(f"Failed to load model version {version} from the registry, "
+                              f"retrying in {backoff:.0f}s: {e}")
+
+        with self._load_lock:
+            # Read the registry again under the lock, an activation may have promoted a version meanwhile
+            current_version, canary, shadow_version = self._read_registry()
+            if current_version in self.pipelines:
+                self._switch(current_version)
+            if canary != self.canary and (canary is None or canary[0] in self.pipelines):
+                self.canary = canary
+                logging.info(f"Canary routing set to {canary}")
+            if shadow_version != self.shadow_version and (shadow_version is None or shadow_version in self.pipelines):
+                self.shadow_version = shadow_version
+                logging.info(f"Shadow routing set to {shadow_version}")
+            # Versions that stopped serving become ordinary pinned versions and may now be evicted
+            self._evict_pinned()
+
+    def _watch(self):
+        while not self._stop_watching.wait(self.config.watch_interval_seconds):
+            try:
+                self.sync_with_registry()
+            except Exception as e:
+                logging.error(f"Failed to sync with the model registry: {e}")
+
+    def start_watching(self):
+        if self._watch_thread is None:
+            self._watch_thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._watch_thread.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+
+    def get_explainer(self, version):
+        """Load the explainer of the variant a version serves on first use; None if there is none."""
+        try:
+            if version in self.explainers:
+                return self.explainers[version]
+
+            pipeline = self.pipelines.get(version) or self.load_version(version)
+            explainer_path = pipeline.get_explainer_path()
+            explainer = load_object(file_path=explainer_path) if os.path.exists(explainer_path) else None
+            self.explainers = {**self.explainers, version: explainer}
+            return explainer
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def set_canary(self, version, weight):
+        """Load the canary here, then record it in the registry so every process routes the same way."""
+        with self._load_lock:
+            self.load_version(version)
+            self.registry.update_routing(canary={"version": version, "weight": float(weight)})
+            self.canary = (version, float(weight))
+
+    def clear_canary(self):
+        self.registry.update_routing(canary=None)
+        self.canary = None
+
+    def set_shadow(self, version):
+        with self._load_lock:
+            self.load_version(version)
+            self.registry.update_routing(shadow=version)
+            self.shadow_version = version
+
+    def clear_shadow(self):
+        self.registry.update_routing(shadow=None)
+        self.shadow_version = None
+
+    def serving_versions(self):
+        canary = self.canary
+        return {self.active_version, self.shadow_version, canary[0] if canary else None} - {None}
+
+    def unload(self, version):
+        if version in self.serving_versions():
+            raise ValueError(f"Model version {version} is still serving traffic")
+        self.pipelines = {name: pipeline for name, pipeline in self.pipelines.items() if name != version}
+        self.explainers = {name: explainer for name, explainer in self.explainers.items() if name != version}
+        self._last_used.pop(version, None)
+        logging.info(f"Unloaded model version {version}")
+
+    def _evict_pinned(self, keep=None):
+        # Only versions loaded for ?model= requests are evicted; serving versions are never touched
+        pinned = sorted(
+            (version for version in self.pipelines if version not in self.serving_versions() and version != keep),
+            key=lambda version: self._last_used.get(version, 0.0),
+        )
+        keep_is_pinned = keep is not None and keep not in self.serving_versions()
+        n_allowed = max(self.config.max_pinned_versions - keep_is_pinned, 0)
+        for version in pinned[:max(len(pinned) - n_allowed, 0)]:
+            self.unload(version)
+
+    def route(self, pinned_version=None):
+        """
+        Pick the (version, pipeline) that should answer a request.
+
+        Pinned versions must already be loaded with load_version. One that was evicted in
+        between raises KeyError, so the caller loads it again off the event loop.
+        """
+        if pinned_version is not None:
+            pipeline = self.pipelines.get(pinned_version)
+            if pipeline is None:
+                raise KeyError(f"Model version {pinned_version} is not loaded")
+            self._last_used[pinned_version] = time.monotonic()
+            return pinned_version, pipeline
+
+        canary = self.canary
+        if canary is not None and random.random() < canary[1]:
+            return canary[0], self.pipelines[canary[0]]
+
+        version = self.active_version
+        return version, self.pipelines[version]
+
+    def status(self):
+        return {
+            "active_version": self.active_version,
+            "canary": {"version": self.canary[0], "weight": self.canary[1]} if self.canary else None,
+            "shadow_version": self.shadow_version,
+            "loaded_versions": sorted(self.pipelines),
+            "registry_versions": self.registry.list_versions(),
+            "last_activation": self.last_activation,
+            "registry_current": self.registry.current_version(),
+            "registry_routing": self.registry.get_routing(),
+        }
@@ -1,25 +1,77 @@
 import sys
 import pandas as pd
+from dataclasses import dataclass, field
 from source.exception import CustomException
 from source.utils import load_object
 import os
 from source.logger import logging
 
 
+# Configuration class for the served model; MODEL_VARIANT picks "full", "distilled" or "optimized"
+@dataclass
+class PredictPipelineConfig:
+    model_path: str = os.path.join("artifacts", "model.pkl")
+    distilled_model_path: str = os.path.join("artifacts", "distilled_model.pkl")
+    optimized_model_path: str = os.path.join("artifacts", "optimized_model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "Preprocessor.pkl")
+    explainer_path: str = os.path.join("artifacts", "explainer.pkl")
+    distilled_explainer_path: str = os.path.join("artifacts", "distilled_explainer.pkl")
+    optimized_explainer_path: str = os.path.join("artifacts", "optimized_explainer.pkl")
+    model_variant: str = field(default_factory=lambda: os.environ.get("MODEL_VARIANT", "full"))
+
+
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, config=None):
+        self.config = config or PredictPipelineConfig()
+        self.model = None
+        self.preprocessor = None
 
-    def predict(self,features):
+    def get_model_path(self):
+        model_paths = {
+            "full": self.config.model_path,
+            "distilled": self.config.distilled_model_path,
+            "optimized": self.config.optimized_model_path,
+        }
+        if self.config.model_variant not in model_paths:
+            raise ValueError(f"Unknown model variant: {self.config.model_variant}")
+        return model_paths[self.config.model_variant]
+
+    def get_explainer_path(self):
+        # Each variant has its own explainer, so /explain always explains the model /predict serves
+        explainer_paths = {
+            "full": self.config.explainer_path,
+            "distilled": self.config.distilled_explainer_path,
+            "optimized": self.config.optimized_explainer_path,
+        }
+        if self.config.model_variant not in explainer_paths:
+            raise ValueError(f"Unknown model variant: {self.config.model_variant}")
+        return explainer_paths[self.config.model_variant]
+
+    def load(self):
         try:
-            model_path=os.path.join("artifacts","model.pkl")
-            preprocessor_path=os.path.join('artifacts','Preprocessor.pkl')
+            model_path=self.get_model_path()
+            preprocessor_path=self.config.preprocessor_path
             print("Before Loading")
             model=load_object(file_path=model_path)
             preprocessor=load_object(file_path=preprocessor_path)
             print("After Loading")
-            data_scaled=preprocessor.transform(features)
-            preds=model.predict(data_scaled)
+            # predict checks self.model, so set it last to never expose a half-loaded pipeline
+            self.preprocessor = preprocessor
+            self.model = model
+            return self
+
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def predict(self,features):
+        try:
+            if self.model is None:
+                self.load()
+            data_scaled=self.preprocessor.transform(features)
+            # Models are trained on dense arrays; xgboost would read sparse zeros as missing values
+            if hasattr(data_scaled, "toarray"):
+                data_scaled=data_scaled.toarray()
+            preds=self.model.predict(data_scaled)
             return preds
         
         except Exception as e:
@@ -36,7 +88,7 @@ class CustomData:
         self.cost=cost
         self.type=type
         self.city=city
-        logging.info("get all the data")
+        logging.info("get all the data", extra={"hot_path": True})
 
     def get_data_as_data_frame(self):
         try:
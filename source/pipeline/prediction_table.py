@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import numpy as np
+from dataclasses import dataclass
+from source.exception import CustomException
+from source.logger import logging
+
+
+# Configuration class for the materialized prediction table paths
+@dataclass
+class PredictionTableConfig:
+    table_path: str = os.path.join("artifacts", "prediction_table.npy")
+    metadata_path: str = os.path.join("artifacts", "prediction_table.json")
+
+
+class PredictionTable:
+    """
+    Memory-mapped table of predictions over the full categorical cross-product.
+
+    Each categorical combination holds a grid of predictions over log1p(votes)
+    and log1p(cost); lookups are bilinear interpolation on that grid, so the
+    cost per row is a handful of array reads regardless of the model size.
+    """
+
+    def __init__(self, config=None):
+        try:
+            self.config = config or PredictionTableConfig()
+            with open(self.config.metadata_path) as f:
+                self.metadata = json.load(f)
+
+            self.table_path = self.get_table_path(self.config, self.metadata)
+            self.table = np.load(self.table_path, mmap_mode="r")
+            self.cat_features = self.metadata["cat_features"]
+            self.cat_index = [
+                {category: i for i, category in enumerate(self.metadata["categories"][feature])}
+                for feature in self.cat_features
+            ]
+            self.cat_shape = tuple(len(index) for index in self.cat_index)
+            self.votes_axis = np.array(self.metadata["votes_axis"], dtype=np.float64)
+            self.cost_axis = np.array(self.metadata["cost_axis"], dtype=np.float64)
+            logging.info(f"Loaded prediction table {self.table.shape} from {self.table_path}")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def get_table_path(config, metadata=None):
+        """Path of the table file the metadata points at; None when there is no metadata yet."""
+        if metadata is None:
+            if not os.path.isfile(config.metadata_path):
+                return None
+            with open(config.metadata_path) as f:
+                metadata = json.load(f)
+        # Tables materialized before the file name was recorded live at the configured path
+        if "table_file" not in metadata:
+            return config.table_path
+        return os.path.join(os.path.dirname(config.metadata_path), metadata["table_file"])
+
+    @property
+    def error_bound(self):
+        return self.metadata.get("error_bound")
+
+    @property
+    def model_version(self):
+        # Tables built before versioning were always scored with the legacy artifacts/ model
+        return self.metadata.get("model_version", "artifacts")
+
+    @staticmethod
+    def _grid_position(values, axis):
+        """Return the lower grid cell and the fractional offset inside it, in log1p space."""
+        log_values = np.log1p(np.asarray(values, dtype=np.float64))
+        in_range = (log_values >= axis[0]) & (log_values <= axis[-1])
+        cell = np.clip(np.searchsorted(axis, log_values, side="right") - 1, 0, len(axis) - 2)
+        frac = (log_values - axis[cell]) / (axis[cell + 1] - axis[cell])
+        return cell, np.where(in_range, frac, np.nan), in_range
+
+    def lookup(self, features):
+        """
+        Interpolate predictions for a DataFrame of raw inputs.
+
+        Rows with an unknown category or votes/cost outside the grid come back as NaN,
+        so callers can fall back to the live model for them.
+        """
+        try:
+            n_rows = len(features)
+            known = np.ones(n_rows, dtype=bool)
+            cat_idx = []
+            for feature, index in zip(self.cat_features, self.cat_index):
+                idx = features[feature].astype(str).map(index)
+                known &= idx.notna().to_numpy()
+                cat_idx.append(idx.fillna(0).to_numpy(dtype=np.int64))
+            combo = np.ravel_multi_index(cat_idx, self.cat_shape)
+
+            v_cell, v_frac, v_in_range = self._grid_position(features["votes"], self.votes_axis)
+            c_cell, c_frac, c_in_range = self._grid_position(features["cost"], self.cost_axis)
+            covered = known & v_in_range & c_in_range
+
+            predictions = np.full(n_rows, np.nan)
+            if covered.any():
+                combo, v_cell, c_cell = combo[covered], v_cell[covered], c_cell[covered]
+                v_frac, c_frac = v_frac[covered], c_frac[covered]
+                corner = lambda dv, dc: self.table[combo, v_cell + dv, c_cell + dc].astype(np.float64)
+                predictions[covered] = (
+                    corner(0, 0) * (1 - v_frac) * (1 - c_frac)
+                    + corner(1, 0) * v_frac * (1 - c_frac)
+                    + corner(0, 1) * (1 - v_frac) * c_frac
+                    + corner(1, 1) * v_frac * c_frac
+                )
+            return predictions
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -1,13 +1,10 @@
 # utils.py
 
+# Heavy imports (dill, scikit-learn) are deferred to the functions that need them so that
+# importing this module from the serving path stays cheap.
+
 import os
 import sys
-import numpy as np
-import pandas as pd
-import dill
-import pickle
-from sklearn.metrics import r2_score
-from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
 from source.logger import logging
 from source.exception import CustomException
 
@@ -20,6 +17,8 @@ def save_object(obj, file_path):
         file_path: The path to the file where the object will be saved.
     """
     try:
+        import dill
+
         dir_path = os.path.dirname(file_path)
         
         # Create directory if it does not exist
@@ -49,6 +48,9 @@ def model_training(param, models, x_train_array, y_train_array, x_test_array, y_
         report: Dictionary containing R2 score of each model on the test data.
     """
     try:
+        from sklearn.metrics import r2_score
+        from sklearn.model_selection import RandomizedSearchCV
+
         report = {}
 
         for model_name, model in models.items():
@@ -92,6 +94,8 @@ def load_object(file_path):
         The loaded object.
     """
     try:
+        import dill
+
         with open(file_path, "rb") as file_obj:
             logging.info(f"Loading object from {file_path}")
             return dill.load(file_obj)
@@ -99,3 +103,75 @@ def load_object(file_path):
     except Exception as e:
         logging.error(f"Error loading object: {e}")
         raise CustomException(e, sys)
+
+def get_feature_domain(preprocessor):
+    """
+    Read the input domain back from a fitted preprocessor.
+    
+    Args:
+        preprocessor: The fitted ColumnTransformer saved as Preprocessor.pkl.
+    
+    Returns:
+        num_features: List of numeric input columns.
+        cat_domain: Dictionary mapping each categorical input column to its known categories.
+    """
+    try:
+        transformers = {name: columns for name, _, columns in preprocessor.transformers_}
+        num_features = list(transformers["num_features"])
+        cat_features = list(transformers["cat_features"])
+
+        encoder = preprocessor.named_transformers_["cat_features"].named_steps["encoding"]
+        cat_domain = {
+            feature: [str(category) for category in categories]
+            for feature, categories in zip(cat_features, encoder.categories_)
+        }
+
+        return num_features, cat_domain
+
+    except Exception as e:
+        logging.error(f"Error reading feature domain: {e}")
+        raise CustomException(e, sys)
+
+
+def measure_speed(model, x_array, n_repeats=200):
+    """
+    Measure the serving cost of a model.
+
+    Args:
+        model: Fitted model with a predict method.
+        x_array: Dense array of preprocessed rows to predict on.
+        n_repeats: Number of single-row predictions to average the latency over.
+
+    Returns:
+        Dictionary with the serialized size, load time, single-row latency and batch throughput.
+    """
+    try:
+        import time
+        import dill
+
+        serialized = dill.dumps(model)
+
+        start = time.perf_counter()
+        dill.loads(serialized)
+        load_seconds = time.perf_counter() - start
+
+        single_row = x_array[:1]
+        start = time.perf_counter()
+        for _ in range(n_repeats):
+            model.predict(single_row)
+        row_latency_us = (time.perf_counter() - start) / n_repeats * 1e6
+
+        start = time.perf_counter()
+        model.predict(x_array)
+        batch_rows_per_second = x_array.shape[0] / (time.perf_counter() - start)
+
+        return {
+            "size_bytes": len(serialized),
+            "load_seconds": load_seconds,
+            "row_latency_us": row_latency_us,
+            "batch_rows_per_second": batch_rows_per_second,
+        }
+
+    except Exception as e:
+        logging.error(f"Error measuring model speed: {e}")
+        raise CustomException(e, sys)